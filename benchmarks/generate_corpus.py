@@ -0,0 +1,177 @@
+import os
+import io
+import sys
+import zlib
+import struct
+import random
+import argparse
+from docx import Document
+from docx.shared import Cm
+
+
+# Генератор синтетических исходных ФОС для замеров производительности.
+# Файлы повторяют разметку, которую ожидает FileValidator: первая таблица -
+# компетенции с диапазонами номеров заданий, вторая - ключи к заданиям,
+# затем раздел "Перечень заданий" с кодами компетенций и заданиями
+# "N. Инструкция: ...". В задания добавляются таблицы и рисунки, в том
+# числе рисунки отдельным абзацем без текста.
+#
+#   python benchmarks/generate_corpus.py corpus -n 50 --competencies 6 --tasks 12
+
+COMPETENCY_PREFIXES = ['УК', 'ОПК', 'ПК']
+FIRST_HEADER = [
+    "Код компетенции", "Наименование компетенции", "Наименование индикаторов",
+    "Наименование дисциплины", "Семестр", "Номер задания",
+]
+SECOND_HEADER = [
+    "Номер задания", "Правильный ответ", "Критерии оценивания",
+    "Тип задания", "Уровень сложности", "Время выполнения",
+]
+WORDS = (
+    "анализ данных модель система алгоритм структура информация метод "
+    "проектирование разработка требование процесс оценка результат задача "
+    "программа интерфейс база знание навык управление качество объект "
+    "свойство функция значение параметр условие решение пример вариант"
+).split()
+DISCIPLINES = [
+    "Информатика", "Программирование", "Базы данных", "Математический анализ",
+    "Дискретная математика", "Операционные системы", "Компьютерные сети",
+    "Архитектура ЭВМ", "Проектирование информационных систем", "Теория алгоритмов",
+]
+TASK_TYPES = ["закрытый", "открытый", "на соответствие", "на последовательность"]
+LEVELS = ["базовый", "повышенный", "высокий"]
+
+
+def sentence(rnd, words=8):
+    text = " ".join(rnd.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def png(width, height, rgb):
+    raw = b"".join(b"\x00" + bytes(rgb) * width for _ in range(height))
+
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data) & 0xffffffff
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def make_source(path, competencies=6, tasks=12, options=4, table_every=4,
+                table_rows=3, image_every=6, seed=0):
+    rnd = random.Random(seed)
+    doc = Document()
+    discipline = DISCIPLINES[seed % len(DISCIPLINES)]
+
+    codes = [
+        f"{COMPETENCY_PREFIXES[i % len(COMPETENCY_PREFIXES)]}-{i // len(COMPETENCY_PREFIXES) + 1}"
+        for i in range(competencies)
+    ]
+
+    first = doc.add_table(rows=1, cols=len(FIRST_HEADER))
+    for cell, text in zip(first.rows[0].cells, FIRST_HEADER):
+        cell.text = text
+    start = 1
+    for code in codes:
+        values = [
+            code, "Способен " + sentence(rnd, 6).lower(), f"ИД-1.{code} " + sentence(rnd, 5),
+            discipline, str(rnd.randint(1, 8)), f"{start}-{start + tasks - 1}",
+        ]
+        for cell, text in zip(first.add_row().cells, values):
+            cell.text = text
+        start += tasks
+    total = start - 1
+
+    second = doc.add_table(rows=1, cols=len(SECOND_HEADER))
+    for cell, text in zip(second.rows[0].cells, SECOND_HEADER):
+        cell.text = text
+    for num in range(1, total + 1):
+        values = [
+            f"{num}.", rnd.choice("АБВГ"), sentence(rnd, 6), rnd.choice(TASK_TYPES),
+            rnd.choice(LEVELS), str(rnd.randint(1, 10)),
+        ]
+        for cell, text in zip(second.add_row().cells, values):
+            cell.text = text
+
+    doc.add_paragraph("Перечень заданий")
+    images = [png(40, 30, (200, 40, 40)), png(30, 30, (40, 40, 200))]
+    num = 1
+    for code in codes:
+        doc.add_paragraph(code)
+        for _ in range(tasks):
+            paragraph = doc.add_paragraph()
+            paragraph.add_run(f"{num}. Инструкция: ").bold = True
+            paragraph.add_run(sentence(rnd, 12))
+            for letter in "АБВГДЕ"[:options]:
+                doc.add_paragraph(f"{letter}) {sentence(rnd, 4)}")
+            if table_every and num % table_every == 0:
+                table = doc.add_table(rows=table_rows, cols=2)
+                for row in table.rows:
+                    row.cells[0].text = rnd.choice(WORDS)
+                    row.cells[1].text = sentence(rnd, 3)
+            if image_every and num % image_every == 0:
+                # Через раз рисунок стоит отдельной строкой, в абзаце без текста
+                caption = "Рисунок: " if (num // image_every) % 2 else ""
+                doc.add_paragraph(caption).add_run().add_picture(
+                    io.BytesIO(rnd.choice(images)), width=Cm(2)
+                )
+            num += 1
+    doc.save(path)
+    return total
+
+
+def generate_corpus(output_dir, files, **options):
+    # Возвращает список созданных файлов
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i in range(files):
+        path = os.path.join(output_dir, f"ФОС_{i + 1:04d}.docx")
+        make_source(path, seed=i, **options)
+        paths.append(path)
+    return paths
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Генерация синтетических исходных ФОС")
+    parser.add_argument("output", help="папка для файлов")
+    parser.add_argument("-n", "--files", type=int, default=10, help="число файлов")
+    add_corpus_arguments(parser)
+    return parser
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--competencies", type=int, default=6, help="компетенций в файле")
+    parser.add_argument("--tasks", type=int, default=12, help="заданий на компетенцию")
+    parser.add_argument("--options", type=int, default=4, help="вариантов ответа в задании")
+    parser.add_argument("--table-every", type=int, default=4,
+                        help="таблица в каждом N-м задании (0 - без таблиц)")
+    parser.add_argument("--table-rows", type=int, default=3, help="строк во вложенной таблице")
+    parser.add_argument("--image-every", type=int, default=6,
+                        help="рисунок в каждом N-м задании (0 - без рисунков)")
+
+
+def corpus_options(args):
+    return {
+        'competencies': args.competencies,
+        'tasks': args.tasks,
+        'options': args.options,
+        'table_every': args.table_every,
+        'table_rows': args.table_rows,
+        'image_every': args.image_every,
+    }
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = generate_corpus(args.output, args.files, **corpus_options(args))
+    print(f"Создано файлов: {len(paths)} в {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
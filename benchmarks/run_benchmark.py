@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_corpus import generate_corpus, add_corpus_arguments, corpus_options  # noqa: E402
+from splitter_core import run_batch, SUCCESS_DIR_NAME  # noqa: E402
+from summary_core import SummaryBuilder  # noqa: E402
+
+
+# Сквозной замер: генерация корпуса, разрезание (run_batch), чтение файлов
+# компетенций (process_directory) и запись сводного ФОС (write_summary)
+# для нескольких размеров корпуса. Для каждого этапа выводятся время,
+# пиковая память Python (tracemalloc) и пропускная способность.
+#
+#   python benchmarks/run_benchmark.py --sizes 10 50 200 -j 4 --json bench.json
+#
+# tracemalloc замедляет работу в несколько раз, поэтому время снимается
+# в отдельном прогоне этапа без него, а память - в повторном прогоне.
+# Память рабочих процессов при -j > 1 tracemalloc не учитывает; для
+# сравнения памяти используйте -j 1.
+
+
+def measure(func, memory=True):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_size(work_dir, size, workers, options, memory=True):
+    source_dir = os.path.join(work_dir, f"sources_{size}")
+    result_dir = os.path.join(work_dir, f"result_{size}")
+    summary_path = os.path.join(work_dir, f"summary_{size}", "Сводный.docx")
+    shutil.rmtree(result_dir, ignore_errors=True)
+    os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+
+    start = time.perf_counter()
+    sources = generate_corpus(source_dir, size, **options)
+    generate_time = time.perf_counter() - start
+
+    stages = []
+
+    report, elapsed, peak = measure(lambda: run_batch(sources, result_dir, workers), memory)
+    failed = sum(1 for rows in report.values() if rows)
+    stages.append(('split', len(sources), elapsed, peak))
+
+    competency_dir = os.path.join(result_dir, SUCCESS_DIR_NAME)
+    competency_files = len([f for f in os.listdir(competency_dir) if f.endswith('.docx')])
+
+    builder = SummaryBuilder(use_cache=False)
+    _, elapsed, peak = measure(lambda: builder.process_directory(competency_dir), memory)
+    stages.append(('ingest', competency_files, elapsed, peak))
+
+    _, elapsed, peak = measure(lambda: builder.write_summary(summary_path), memory)
+    stages.append(('write', len(builder.all_tasks), elapsed, peak))
+
+    return {
+        'size': size,
+        'generate_s': round(generate_time, 3),
+        'failed': failed,
+        'stages': [
+            {
+                'stage': name,
+                'items': items,
+                'wall_s': round(elapsed, 3),
+                'peak_mb': round(peak / 2 ** 20, 1) if peak is not None else None,
+                'items_per_s': round(items / elapsed, 1) if elapsed else None,
+            }
+            for name, items, elapsed, peak in stages
+        ],
+    }
+
+
+def print_result(result):
+    print(f"Файлов: {result['size']} (генерация {result['generate_s']} с, "
+          f"с ошибками: {result['failed']})")
+    print(f"  {'этап':<8}{'объектов':>10}{'время, с':>11}{'пик, МБ':>10}{'объектов/с':>13}")
+    for stage in result['stages']:
+        print(f"  {stage['stage']:<8}{stage['items']:>10}{stage['wall_s']:>11}"
+              f"{stage['peak_mb'] if stage['peak_mb'] is not None else '-':>10}"
+              f"{stage['items_per_s']:>13}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Замер разрезания и сборки ФОС на синтетическом корпусе")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50],
+                        help="размеры корпуса (число исходных файлов)")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="процессов для разрезания")
+    parser.add_argument("--work-dir", default=None,
+                        help="рабочая папка (по умолчанию временная, удаляется после замера)")
+    parser.add_argument("--json", default=None, help="сохранить результаты в JSON")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="не замерять память (без повторного прогона этапов)")
+    add_corpus_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="fos_bench_")
+    options = corpus_options(args)
+
+    results = []
+    try:
+        for size in args.sizes:
+            result = run_size(work_dir, size, args.workers, options, not args.no_memory)
+            print_result(result)
+            results.append(result)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'workers': args.workers, 'corpus': options, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
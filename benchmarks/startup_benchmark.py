@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+
+
+# Замер времени до первого окна графического интерфейса. Каждый запуск -
+# отдельный процесс (холодный импорт модулей): в нем импортируется main,
+# создается и показывается MainWindow, после чего процесс сразу завершается.
+# Для каждого запуска выводятся время импорта, создания окна, показа и общее
+# время от старта процесса, а также то, какие тяжелые модули уже загружены.
+#
+#   python benchmarks/startup_benchmark.py -n 10 --json startup.json
+#   python benchmarks/startup_benchmark.py --platform offscreen
+#
+# --preload загружает модули обработки заранее, как это было до отложенного
+# импорта, - для сравнения.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['docx', 'lxml', 'openpyxl']
+
+CHILD_CODE = """
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+if {preload!r}:
+    import splitter_core, summary_core
+import main
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv)
+imported = time.perf_counter()
+window = main.MainWindow()
+created = time.perf_counter()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({{
+    'import_s': imported - start,
+    'window_s': created - imported,
+    'show_s': shown - created,
+    'loaded': [name for name in {heavy!r} if name in sys.modules],
+}}), flush=True)
+"""
+
+
+def run_once(preload=False, platform=None):
+    env = dict(os.environ)
+    if platform:
+        env['QT_QPA_PLATFORM'] = platform
+    code = CHILD_CODE.format(root=ROOT, preload=preload, heavy=HEAVY_MODULES)
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', code], stdout=subprocess.PIPE, env=env, text=True
+    )
+    line = process.stdout.readline()
+    total = time.perf_counter() - start
+    process.wait()
+    if process.returncode != 0 or not line:
+        raise Exception(f"Запуск интерфейса завершился с кодом {process.returncode}")
+
+    result = json.loads(line)
+    result['total_s'] = total
+    return result
+
+
+def summarize(runs):
+    keys = ['import_s', 'window_s', 'show_s', 'total_s']
+    return {
+        key: {
+            'min': round(min(run[key] for run in runs), 4),
+            'median': round(statistics.median(run[key] for run in runs), 4),
+        }
+        for key in keys
+    }
+
+
+def print_summary(summary, loaded):
+    print(f"  {'этап':<10}{'мин, с':>10}{'медиана, с':>13}")
+    for key, label in [('import_s', 'импорт'), ('window_s', 'окно'),
+                       ('show_s', 'показ'), ('total_s', 'всего')]:
+        print(f"  {label:<10}{summary[key]['min']:>10}{summary[key]['median']:>13}")
+    print(f"  загружены при старте: {', '.join(loaded) or 'нет'}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Замер времени запуска графического интерфейса")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="число запусков")
+    parser.add_argument("--platform", default=None,
+                        help="платформа Qt (например, offscreen для сервера без дисплея)")
+    parser.add_argument("--preload", action="store_true",
+                        help="заранее импортировать модули обработки (для сравнения)")
+    parser.add_argument("--json", default=None, help="сохранить результаты в JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    runs = [run_once(args.preload, args.platform) for _ in range(args.runs)]
+    summary = summarize(runs)
+    loaded = runs[-1]['loaded']
+
+    print(f"Запусков: {len(runs)}")
+    print_summary(summary, loaded)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'preload': args.preload, 'summary': summary, 'loaded': loaded,
+                       'runs': runs}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
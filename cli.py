@@ -0,0 +1,191 @@
+import sys
+import os
+import time
+import argparse
+import multiprocessing
+
+
+# Консольный запуск разрезания и сборки ФОС без графического интерфейса.
+# PyQt5 здесь не импортируется, поэтому скрипт работает на сервере без
+# дисплея и подходит для cron и CI:
+#
+#   python cli.py split ФОС/*.docx -o Результат -j 8
+#   python cli.py split ФОС --dry-run -o Проверка
+#   python cli.py split ФОС -o Результат --archive batch
+#   python cli.py build Результат/"Успешно разрезанные ФОС" -o Сводный.docx \
+#       --direction "09.03.01 Информатика" --profile "Программная инженерия" --year 2024
+#   python cli.py watch Результат/"Успешно разрезанные ФОС" -o Сводный/Сводный.docx
+
+
+def log_progress(value, text):
+    print(text, file=sys.stderr)
+
+
+def collect_docx(paths):
+    # Папки разворачиваются в список .docx внутри них (без файлов блокировки Word)
+    from summary_core import is_competency_file
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if is_competency_file(name)
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def run_split(args):
+    from splitter_core import (
+        run_batch, report_path, archive_path, ARCHIVE_BATCH, FAILED_DIR_NAME, REPORT_NAME
+    )
+
+    files = collect_docx(args.files)
+    if not files:
+        print("Не найдено ни одного файла .docx", file=sys.stderr)
+        return 2
+
+    report_rows = run_batch(
+        files, args.output, args.workers,
+        on_progress=None if args.quiet else log_progress,
+        dry_run=args.dry_run, archive=args.archive
+    )
+
+    failed = [idx for idx, rows in report_rows.items() if rows]
+    if args.dry_run:
+        print(f"Проверено файлов: {len(report_rows)}, без ошибок: {len(report_rows) - len(failed)}, "
+              f"с ошибками: {len(failed)}")
+    else:
+        print(f"Обработано файлов: {len(report_rows)}, из них с ошибками: {len(failed)}")
+    if args.archive == ARCHIVE_BATCH and not args.dry_run:
+        print(f"Архив результатов: {archive_path(args.output)} "
+              f"(отчет об ошибках внутри: {FAILED_DIR_NAME}/{REPORT_NAME})")
+    else:
+        print(f"Отчет об ошибках: {report_path(args.output, args.dry_run)}")
+    return 1 if failed else 0
+
+
+def run_build(args):
+    from summary_core import SummaryBuilder
+
+    builder = SummaryBuilder(use_cache=not args.no_cache)
+    builder.process_directory(
+        args.folder, on_progress=None if args.quiet else log_progress
+    )
+    if not builder.has_data():
+        print("Нет данных для построения сводного файла", file=sys.stderr)
+        return 1
+
+    make_output_dir(args.output)
+    builder.write_summary(
+        args.output, args.mapping, args.direction, args.profile, args.year,
+        on_progress=None if args.quiet else log_progress
+    )
+    print(f"Сводный файл: {args.output}")
+    return 0
+
+
+def run_watch(args):
+    from summary_core import SummaryBuilder
+    from folder_watch import FolderWatcher
+
+    if os.path.abspath(os.path.dirname(args.output)) == os.path.abspath(args.folder):
+        print("Сводный файл нельзя сохранять в наблюдаемую папку", file=sys.stderr)
+        return 2
+    make_output_dir(args.output)
+
+    def rebuild(changed):
+        # Кэш разобранных файлов сохраняется между пересборками,
+        # поэтому заново читаются только измененные файлы
+        builder = SummaryBuilder()
+        builder.process_directory(args.folder)
+        stamp = time.strftime('%H:%M:%S')
+        if not builder.has_data():
+            print(f"{stamp} Нет данных для построения сводного файла", file=sys.stderr)
+            return
+        builder.write_summary(args.output, args.mapping, args.direction, args.profile, args.year)
+        print(f"{stamp} Сводный файл обновлен (изменено файлов: {len(changed)}): {args.output}")
+
+    def log_error(error):
+        print(f"{time.strftime('%H:%M:%S')} Ошибка пересборки: {error}", file=sys.stderr)
+
+    watcher = FolderWatcher(
+        args.folder, rebuild, interval=args.interval, settle=args.settle, on_error=log_error
+    )
+    watcher.start()
+    print(f"Наблюдение за папкой {args.folder}, для выхода нажмите Ctrl+C")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+    return 0
+
+
+def make_output_dir(path):
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+
+def add_summary_arguments(parser):
+    parser.add_argument("--mapping", default=None,
+                        help="путь к таблице сопоставления (по умолчанию рядом со сводным файлом)")
+    parser.add_argument("--direction", default="", help="направление подготовки")
+    parser.add_argument("--profile", default="", help="профиль")
+    parser.add_argument("--year", default="", help="год начала подготовки")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="ФОС: разделение и сборка компетенций без графического интерфейса"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    split = subparsers.add_parser("split", help="разрезать ФОС по компетенциям")
+    split.add_argument("files", nargs="+", help="файлы .docx или папки с ними")
+    split.add_argument("-o", "--output", required=True, help="папка для результатов")
+    split.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                       help="число параллельных процессов (по умолчанию - число ядер)")
+    split.add_argument("--dry-run", action="store_true",
+                       help="только проверить файлы: отчет об ошибках без разрезания и копирования")
+    split.add_argument("--archive", choices=["batch", "file"], default=None,
+                       help="писать результаты в архив: batch - один архив на весь пакет вместе "
+                            "с отклоненными файлами и отчетом, file - архив на каждый исходный файл")
+    split.add_argument("-q", "--quiet", action="store_true", help="не выводить ход работы")
+    split.set_defaults(func=run_split)
+
+    build = subparsers.add_parser("build", help="построить сводный ФОС из папки компетенций")
+    build.add_argument("folder", help="папка с файлами компетенций")
+    build.add_argument("-o", "--output", required=True, help="путь к сводному файлу .docx")
+    add_summary_arguments(build)
+    build.add_argument("--no-cache", action="store_true",
+                       help="не использовать кэш разобранных файлов, перечитать все файлы")
+    build.add_argument("-q", "--quiet", action="store_true", help="не выводить ход работы")
+    build.set_defaults(func=run_build)
+
+    watch = subparsers.add_parser(
+        "watch", help="следить за папкой компетенций и пересобирать сводный ФОС при изменениях"
+    )
+    watch.add_argument("folder", help="папка с файлами компетенций")
+    watch.add_argument("-o", "--output", required=True, help="путь к сводному файлу .docx")
+    add_summary_arguments(watch)
+    watch.add_argument("--interval", type=float, default=1.0,
+                       help="период опроса папки, с (по умолчанию 1)")
+    watch.add_argument("--settle", type=float, default=2.0,
+                       help="пауза после последнего изменения перед пересборкой, с (по умолчанию 2)")
+    watch.set_defaults(func=run_watch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import os
+from copy import deepcopy
+from lxml import etree
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.oxml import serialize_part_xml
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part
+from docx.package import Package
+from docx.parts.document import DocumentPart
+from docx.parts.styles import StylesPart
+from docx.oxml.ns import qn
+
+
+# Работа с пакетом docx на уровне частей (parts) без повторного разбора XML.
+
+R_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+W_STYLE_ID = qn('w:styleId')
+W_VAL = qn('w:val')
+# Стили, которые сплиттер сам назначает абзацам выходного документа
+OUTPUT_STYLES = ('heading 2',)
+
+
+class SharedStylesPart(StylesPart):
+    # Часть styles.xml, общая для всех документов из одной заготовки:
+    # дерево стилей только читается (поиск style_id), а при сохранении
+    # отдается заранее сериализованный XML
+    def __init__(self, partname, content_type, element, package, blob):
+        super().__init__(partname, content_type, element, package)
+        self._shared_blob = blob
+
+    @property
+    def blob(self):
+        return self._shared_blob
+
+
+class OutputSkeleton:
+    # Заготовка пустого выходного документа. Шаблон python-docx разбирается
+    # один раз, а каждый новый документ собирается из готовых частей:
+    # копируется только небольшое дерево document.xml, остальные части
+    # (стили, настройки, тема, шрифты и т.д.) передаются готовыми байтами.
+    def __init__(self):
+        template = Document()
+        package = template.part.package
+
+        self._document_part = template.part
+        self.styles = template.styles.element
+        self._numbering_part = template.part.numbering_part
+        self._parts = [
+            (part, part.blob) for part in package.iter_parts()
+            if part is not self._document_part
+        ]
+        self._package_rels = list(package.rels.values())
+
+    def new_document(self, styles=None, numbering=None):
+        # styles - пара (дерево, байты) вместо стилей заготовки,
+        # numbering - байты numbering.xml вместо нумерации заготовки
+        package = Package()
+        parts = {
+            self._document_part: DocumentPart(
+                self._document_part.partname,
+                self._document_part.content_type,
+                deepcopy(self._document_part.element),
+                package,
+            )
+        }
+        for part, blob in self._parts:
+            if isinstance(part, StylesPart):
+                element, blob = styles or (part.element, blob)
+                parts[part] = SharedStylesPart(
+                    part.partname, part.content_type, element, package, blob
+                )
+            elif numbering is not None and part is self._numbering_part:
+                parts[part] = Part(part.partname, part.content_type, numbering, package)
+            else:
+                parts[part] = Part(part.partname, part.content_type, blob, package)
+
+        for rel in self._package_rels:
+            package.load_rel(rel.reltype, parts[rel.target_part], rel.rId)
+        for part, new_part in parts.items():
+            for rel in part.rels.values():
+                target = rel.target_ref if rel.is_external else parts[rel.target_part]
+                new_part.load_rel(rel.reltype, target, rel.rId, rel.is_external)
+
+        return package.main_document_part.document
+
+
+class SourceParts:
+    # Части исходного документа, на которые ссылаются копируемые в выходные
+    # файлы элементы: рисунки, внедренные объекты, гиперссылки, нумерация
+    # и стили. Части переносятся готовыми байтами (рисунки не декодируются),
+    # в скопированных элементах переписываются только идентификаторы связей.
+    # Стили и нумерация готовятся один раз на исходный файл.
+    def __init__(self, source_doc, skeleton):
+        self._source_part = source_doc.part
+        self._blobs = {}
+
+        numbering = None
+        for rel in self._source_part.rels.values():
+            if rel.reltype == RT.NUMBERING and not rel.is_external:
+                numbering = rel.target_part.blob
+        self.numbering = numbering
+        self.styles = _output_styles(source_doc, skeleton)
+
+    def copy_relationships(self, elements, document):
+        # elements - уже скопированные в document элементы тела
+        part = document.part
+        rIds = {}
+        copies = {self._source_part: part}
+        partnames = {p.partname for p in part.package.iter_parts()}
+
+        for element in elements:
+            for node in element.iter(tag=etree.Element):
+                attrs = [
+                    (attr, value) for attr, value in node.attrib.items()
+                    if attr.startswith(R_NS)
+                ]
+                for attr, value in attrs:
+                    new_rId = rIds.get(value)
+                    if new_rId is None:
+                        rel = self._source_part.rels.get(value)
+                        if rel is None:
+                            continue
+                        if rel.is_external:
+                            new_rId = part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+                        else:
+                            target = self._copy_part(rel.target_part, part.package, copies, partnames)
+                            new_rId = part.relate_to(target, rel.reltype)
+                        rIds[value] = new_rId
+                    node.set(attr, new_rId)
+
+    def _copy_part(self, source, package, copies, partnames):
+        # Часть копируется вместе со своими связями (например, диаграмма
+        # со встроенной книгой Excel); внутри нее XML не меняется
+        copy = copies.get(source)
+        if copy is not None:
+            return copy
+
+        blob = self._blobs.get(source)
+        if blob is None:
+            blob = self._blobs[source] = source.blob
+
+        partname = source.partname
+        if partname in partnames:
+            partname = _free_partname(partname, partnames)
+        partnames.add(partname)
+
+        copy = copies[source] = Part(partname, source.content_type, blob, package)
+        for rel in source.rels.values():
+            if rel.is_external:
+                copy.load_rel(rel.reltype, rel.target_ref, rel.rId, True)
+            else:
+                target = self._copy_part(rel.target_part, package, copies, partnames)
+                copy.load_rel(rel.reltype, target, rel.rId)
+        return copy
+
+
+def _output_styles(source_doc, skeleton):
+    # Выходной файл получает стили исходного, чтобы скопированные абзацы
+    # выглядели так же. Недостающие стили сплиттера (заголовок раздела)
+    # добавляются из заготовки
+    styles = source_doc.styles.element
+    missing = [name for name in OUTPUT_STYLES if styles.get_by_name(name) is None]
+    if missing:
+        styles = deepcopy(styles)
+        for name in missing:
+            _add_style(styles, skeleton.styles.get_by_name(name), skeleton.styles)
+    return styles, serialize_part_xml(styles)
+
+
+def _add_style(styles, style, template_styles):
+    if style is None or styles.get_by_id(style.get(W_STYLE_ID)) is not None:
+        return
+    styles.append(deepcopy(style))
+    # Вместе со стилем переносятся стили, на которые он ссылается
+    for ref in ('w:basedOn', 'w:next', 'w:link'):
+        ref_el = style.find(qn(ref))
+        if ref_el is not None:
+            _add_style(styles, template_styles.get_by_id(ref_el.get(W_VAL)), template_styles)
+
+
+def _free_partname(partname, partnames):
+    base, ext = os.path.splitext(partname)
+    base = base.rstrip('0123456789')
+    n = 1
+    while PackURI('%s%d%s' % (base, n, ext)) in partnames:
+        n += 1
+    return PackURI('%s%d%s' % (base, n, ext))
@@ -0,0 +1,115 @@
+import zipfile
+from lxml import etree
+from docx.opc.constants import RELATIONSHIP_TYPE as RT, RELATIONSHIP_TARGET_MODE as RTM
+from docx.opc.packuri import PackURI, PACKAGE_URI
+from docx.opc.pkgreader import _ContentTypeMap
+from docx.opc.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.oxml.parser import element_class_lookup
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+
+# Потоковое чтение тела документа прямо из архива docx.
+# Объектная модель python-docx (стили, нумерация, все части пакета) не
+# строится: document.xml разбирается по кускам, и каждый абзац или таблица
+# верхнего уровня отдается сразу после разбора, а затем удаляется из дерева.
+# Элементы получают те же классы, что и при Document(), поэтому обертки
+# Paragraph и Table дают тот же текст и оформление.
+
+W_BODY = qn('w:body')
+W_P = qn('w:p')
+W_TBL = qn('w:tbl')
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ArchivePart:
+    # Часть пакета, которая читается из архива только по запросу.
+    # Поддерживает то, что нужно при извлечении рисунков:
+    # related_parts, blob, content_type и partname. Для связей хранятся
+    # также их типы (rel_types) и внешние цели (external_rels -
+    # пары (тип, адрес))
+    def __init__(self, archive, partname, content_type):
+        self._archive = archive
+        self.partname = partname
+        self.content_type = content_type
+        self.related_parts = {}
+        self.rel_types = {}
+        self.external_rels = {}
+
+    @property
+    def blob(self):
+        return self._archive.read(self.partname.membername)
+
+    @property
+    def part(self):
+        # Часть служит родителем для оберток Paragraph и Table
+        return self
+
+
+def iter_body(file_path):
+    # Абзацы (Paragraph) и таблицы (Table) верхнего уровня тела документа.
+    # Архив открыт, пока идет перебор: рисунки читаются по мере надобности
+    with zipfile.ZipFile(file_path) as archive:
+        part = _document_part(archive)
+
+        parser = etree.XMLPullParser(
+            events=('start', 'end'), remove_blank_text=True, resolve_entities=False
+        )
+        parser.set_element_class_lookup(element_class_lookup)
+
+        body = None
+        with archive.open(part.partname.membername) as stream:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    if event == 'start':
+                        if element.tag == W_BODY:
+                            body = element
+                        continue
+                    if body is None or element.getparent() is not body:
+                        continue
+                    if element.tag == W_P:
+                        yield Paragraph(element, part)
+                    elif element.tag == W_TBL:
+                        yield Table(element, part)
+                    # Обработанные элементы больше не нужны
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del body[0]
+        parser.close()
+
+
+def _document_part(archive):
+    content_types = _ContentTypeMap.from_xml(archive.read('[Content_Types].xml'))
+
+    partname = None
+    for rel in _read_rels(archive, PACKAGE_URI):
+        if rel.reltype == RT.OFFICE_DOCUMENT:
+            partname = PackURI.from_rel_ref(PACKAGE_URI.baseURI, rel.target_ref)
+            break
+    if partname is None:
+        raise Exception("В архиве не найден основной документ")
+
+    part = ArchivePart(archive, partname, content_types[partname])
+    for rel in _read_rels(archive, partname):
+        if rel.target_mode == RTM.EXTERNAL:
+            part.external_rels[rel.rId] = (rel.reltype, rel.target_ref)
+            continue
+        target = PackURI.from_rel_ref(partname.baseURI, rel.target_ref)
+        if target.membername not in archive.NameToInfo:
+            continue
+        part.related_parts[rel.rId] = ArchivePart(archive, target, content_types[target])
+        part.rel_types[rel.rId] = rel.reltype
+    return part
+
+
+def _read_rels(archive, partname):
+    membername = partname.rels_uri.membername
+    if membername not in archive.NameToInfo:
+        return []
+    return parse_xml(archive.read(membername)).Relationship_lst
@@ -0,0 +1,125 @@
+import re
+from collections import namedtuple
+from xml.sax.saxutils import escape
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.oxml.simpletypes import ST_Merge
+
+
+# Построение таблиц Word одной вставкой XML и чтение текста таблиц.
+# В python-docx каждое обращение к row.cells заново обходит всю сетку таблицы,
+# поэтому заполнение через add_row().cells растет квадратично с числом строк.
+# Здесь все строки собираются в одну строку XML, разбираются один раз и
+# добавляются в таблицу целиком.
+
+# text=None - пустой абзац без прогона, как у только что созданной ячейки;
+# список строк в text дает по абзацу на каждую строку;
+# span - число объединяемых по горизонтали столбцов (w:gridSpan);
+# vmerge - 'restart' или 'continue' для объединения по вертикали (w:vMerge)
+Cell = namedtuple('Cell', ['text', 'span', 'bold', 'align', 'vmerge'],
+                  defaults=(1, False, None, None))
+
+_SPECIAL_CHARS = re.compile(r'([\t\n\r])')
+
+
+def add_table(doc, rows, cols, style=None, alignment=None, align=None):
+    # rows - последовательность строк; ячейка задается строкой текста или Cell.
+    # align - выравнивание абзацев для ячеек, заданных строкой
+    table = doc.add_table(rows=0, cols=cols)
+    if style is not None:
+        table.style = style
+    if alignment is not None:
+        table.alignment = alignment
+
+    widths = [int(col.get(qn('w:w'))) for col in table._tbl.tblGrid.iterchildren(qn('w:gridCol'))]
+    default_align = _align_value(align)
+
+    parts = []
+    for row in rows:
+        parts.append('<w:tr>')
+        col = 0
+        for cell in row:
+            if not isinstance(cell, Cell):
+                cell = Cell(cell, align=default_align)
+            parts.append(_cell_xml(cell, sum(widths[col:col + cell.span])))
+            col += cell.span
+        parts.append('</w:tr>')
+
+    if parts:
+        tbl = parse_xml('<w:tbl %s>%s</w:tbl>' % (nsdecls('w'), ''.join(parts)))
+        table._tbl.extend(list(tbl))
+    return table
+
+
+def table_texts(table):
+    # Тексты ячеек по строкам - то же, что [[cell.text for cell in row.cells]
+    # for row in table.rows], но за один проход по XML таблицы. python-docx
+    # для каждого row.cells заново ищет ячейки над объединенными по вертикали,
+    # поэтому таблицу разбирают один раз и дальше работают с этой матрицей.
+    # Ячейка с w:gridSpan повторяется по числу столбцов, продолжение w:vMerge
+    # получает текст и ширину начальной ячейки объединения
+    rows = []
+    above = {}
+    for tr in table._tbl.tr_lst:
+        offset = tr.grid_before
+        row = []
+        current = {}
+        for tc in tr.tc_lst:
+            merged = above.get(offset) if tc.vMerge == ST_Merge.CONTINUE else None
+            if merged is None:
+                merged = ("\n".join(p.text for p in tc.p_lst), tc.grid_span)
+            text, span = merged
+            row.extend([text] * span)
+            current[offset] = merged
+            offset += tc.grid_span
+        rows.append(row)
+        above = current
+    return rows
+
+
+def _align_value(align):
+    if align is None or isinstance(align, str):
+        return align
+    return align.xml_value
+
+
+def _cell_xml(cell, width):
+    tc_pr = '<w:tcW w:type="dxa" w:w="%d"/>' % width
+    if cell.span > 1:
+        tc_pr += '<w:gridSpan w:val="%d"/>' % cell.span
+    if cell.vmerge == 'restart':
+        tc_pr += '<w:vMerge w:val="restart"/>'
+    elif cell.vmerge == 'continue':
+        tc_pr += '<w:vMerge/>'
+    return '<w:tc><w:tcPr>%s</w:tcPr>%s</w:tc>' % (tc_pr, _paragraph_xml(cell))
+
+
+def _paragraph_xml(cell):
+    align = _align_value(cell.align)
+    p_pr = '<w:pPr><w:jc w:val="%s"/></w:pPr>' % align if align else ''
+    if cell.text is None:
+        return '<w:p>%s</w:p>' % p_pr
+    r_pr = '<w:rPr><w:b/></w:rPr>' if cell.bold else ''
+    texts = [cell.text] if isinstance(cell.text, str) else cell.text
+    return ''.join(
+        '<w:p>%s<w:r>%s%s</w:r></w:p>' % (p_pr, r_pr, _run_content_xml(text))
+        for text in texts
+    )
+
+
+def _run_content_xml(text):
+    # Так же, как run.text в python-docx: табуляция и переводы строк
+    # становятся элементами w:tab и w:br
+    parts = []
+    for chunk in _SPECIAL_CHARS.split(text):
+        if not chunk:
+            continue
+        if chunk == '\t':
+            parts.append('<w:tab/>')
+        elif chunk in ('\n', '\r'):
+            parts.append('<w:br/>')
+        elif chunk != chunk.strip():
+            parts.append('<w:t xml:space="preserve">%s</w:t>' % escape(chunk))
+        else:
+            parts.append('<w:t>%s</w:t>' % escape(chunk))
+    return ''.join(parts)
@@ -0,0 +1,106 @@
+import os
+import time
+import threading
+from summary_core import is_competency_file
+
+
+# Наблюдение за папкой компетенций без внешних зависимостей: папка
+# периодически опрашивается через os.scandir, и снимок (размер, время
+# изменения) сравнивается с предыдущим. Пересборка запускается, когда
+# серия сохранений затихла на settle секунд, и выполняется в отдельном
+# потоке; изменения, пришедшие во время пересборки, объединяются в одну
+# следующую пересборку.
+
+
+def snapshot(dir_path, exclude=()):
+    state = {}
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if not is_competency_file(entry.name) or entry.name in exclude:
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            state[entry.name] = (st.st_size, st.st_mtime_ns)
+    return state
+
+
+def changed_names(old, new):
+    return {name for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+
+
+class FolderWatcher:
+    # rebuild(changed) вызывается с множеством имен измененных, новых
+    # и удаленных файлов; при запуске выполняется одна полная пересборка
+    def __init__(self, dir_path, rebuild, interval=1.0, settle=2.0, on_error=None,
+                 exclude=()):
+        self.dir_path = dir_path
+        self.rebuild = rebuild
+        self.interval = interval
+        self.settle = settle
+        self.on_error = on_error or (lambda error: None)
+        self.exclude = set(exclude)
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = set()
+        self._poll_thread = None
+        self._rebuild_thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._poll_thread = threading.Thread(target=self._poll, daemon=True)
+        self._poll_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in (self._poll_thread, self._rebuild_thread):
+            if thread is not None:
+                thread.join()
+
+    def _poll(self):
+        last = snapshot(self.dir_path, self.exclude)
+        self._request_rebuild(set(last))
+
+        changed = set()
+        changed_at = None
+        while not self._stop.wait(self.interval):
+            try:
+                current = snapshot(self.dir_path, self.exclude)
+            except OSError as e:
+                self.on_error(e)
+                continue
+
+            diff = changed_names(last, current)
+            last = current
+            if diff:
+                # Файлы еще сохраняются - ждем, пока серия изменений затихнет
+                changed |= diff
+                changed_at = time.monotonic()
+            elif changed and time.monotonic() - changed_at >= self.settle:
+                self._request_rebuild(changed)
+                changed = set()
+
+    def _request_rebuild(self, changed):
+        with self._lock:
+            self._pending |= changed
+            if self._running:
+                return
+            self._running = True
+        self._rebuild_thread = threading.Thread(target=self._rebuild_loop, daemon=True)
+        self._rebuild_thread.start()
+
+    def _rebuild_loop(self):
+        while True:
+            with self._lock:
+                changed, self._pending = self._pending, set()
+            try:
+                self.rebuild(changed)
+            except Exception as e:
+                self.on_error(e)
+            with self._lock:
+                if not self._pending or self._stop.is_set():
+                    self._running = False
+                    return
@@ -0,0 +1,110 @@
+import os
+import sys
+import pickle
+import hashlib
+import sqlite3
+
+
+# Постоянный кэш извлеченных из файлов компетенций данных.
+# Запись о файле хранится под его абсолютным путем вместе с размером,
+# временем изменения и хэшем содержимого. Если размер и время совпадают,
+# файл не читается вовсе; если изменилось только время (файл пересохранен
+# без изменений), сверяется хэш. Новые и измененные файлы разбираются
+# заново, записи об удаленных файлах удаляются.
+
+CACHE_VERSION = 4
+CACHE_FILE_NAME = "ingest_cache.sqlite3"
+APP_DIR_NAME = "fos_builder"
+
+
+def default_cache_path():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, APP_DIR_NAME, CACHE_FILE_NAME)
+
+
+def file_hash(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestCache:
+    def __init__(self, path=None):
+        path = path or default_cache_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        # Метки файлов, снятые до чтения: если файл изменится во время
+        # разбора, запись сохранится со старой меткой и будет перечитана
+        self._stamps = {}
+
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_VERSION:
+            # Формат записей изменился - старый кэш не используется
+            self.conn.execute("DROP TABLE IF EXISTS files")
+            self.conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, dir TEXT, size INTEGER, mtime INTEGER, "
+            "hash TEXT, record BLOB)"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, file_path):
+        # Запись о файле или None, если файл новый или изменился
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime, hash, record FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+        if row is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return pickle.loads(row[3])
+
+        digest = file_hash(path) if row is not None and row[0] == st.st_size else None
+        if digest is not None and digest == row[2]:
+            self.conn.execute(
+                "UPDATE files SET mtime = ? WHERE path = ?", (st.st_mtime_ns, path)
+            )
+            return pickle.loads(row[3])
+
+        self._stamps[path] = (st.st_size, st.st_mtime_ns, digest or file_hash(path))
+        return None
+
+    def put(self, file_path, record):
+        path = os.path.abspath(file_path)
+        stamp = self._stamps.pop(path, None)
+        if stamp is None:
+            st = os.stat(path)
+            stamp = (st.st_size, st.st_mtime_ns, file_hash(path))
+        size, mtime, digest = stamp
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, dir, size, mtime, hash, record) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (path, os.path.dirname(path), size, mtime, digest,
+             pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+        )
+
+    def prune(self, dir_path, file_paths):
+        # Удаляет записи о файлах папки, которых в ней больше нет
+        present = {os.path.abspath(p) for p in file_paths}
+        rows = self.conn.execute(
+            "SELECT path FROM files WHERE dir = ?", (os.path.abspath(dir_path),)
+        ).fetchall()
+        self.conn.executemany(
+            "DELETE FROM files WHERE path = ?",
+            [(path,) for (path,) in rows if path not in present]
+        )
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
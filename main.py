@@ -1,67 +1,91 @@
 import sys
-import re
 import os
-import shutil
-import io
-from collections import defaultdict
-from copy import deepcopy
-from docx import Document
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_PARAGRAPH_ALIGNMENT
-from docx.enum.table import WD_TABLE_ALIGNMENT
-from docx.shared import Pt, RGBColor, Cm, Inches, Length, Mm, Emu
-from docx.table import Table
-from docx.text.paragraph import Paragraph
-from openpyxl import Workbook
-from openpyxl.styles import Font
-from openpyxl.utils import get_column_letter
+import multiprocessing
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QFileDialog, QVBoxLayout,
-    QMessageBox, QHBoxLayout, QProgressBar, QLabel, QLineEdit, QTabWidget, QFormLayout
+    QMessageBox, QHBoxLayout, QProgressBar, QLabel, QLineEdit, QTabWidget, QFormLayout,
+    QSpinBox, QComboBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 
 
-class FileValidator:
-    def __init__(self, doc, filename):
-        self.doc = doc
-        self.filename = filename
-        self.errors = []
-        self.code_pattern = re.compile(r'^[A-ZА-Я]+\s*-\s*\d+$')
-        self.range_pattern = re.compile(r'^\d+-\d+$')
+# Модули чтения и записи docx/xlsx (python-docx, lxml, openpyxl) импортируются
+# при первом запуске задания, а не при старте программы: окно открывается
+# быстрее. Вкладка сборки сводного ФОС строится при первом переходе на нее.
 
-    def validate(self):
-        self.validate_competency_codes()
-        self.validate_task_numbers()
-        return not self.errors
 
-    def validate_competency_codes(self):
-        if not self.doc.tables:
-            self.errors.append({"Тип ошибки": "Нет таблиц в документе", "Строка": ""})
-            return
-        first_table = self.doc.tables[0]
-        for row in first_table.rows[1:]:
-            code = row.cells[0].text.strip()
-            if not self.code_pattern.match(code):
-                self.errors.append({
-                    "Тип ошибки": "Неверный формат кода компетенции",
-                    "Строка": code
-                })
-
-    def validate_task_numbers(self):
-        first_table = self.doc.tables[0]
-        for row in first_table.rows[1:]:
-            num_text = row.cells[-1].text.strip()
-            if not self.range_pattern.match(num_text):
-                self.errors.append({
-                    "Тип ошибки": "Неверный формат диапазона номеров заданий",
-                    "Строка": num_text
-                })
-
-
-class CompetencySplitterTab(QWidget):
+class BatchWorker(QObject):
+    # Выполняет задание вне главного потока и сообщает о ходе работы сигналами
+    progress = pyqtSignal(int, str)
+    file_done = pyqtSignal(str, bool)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal(bool)
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+    def run(self):
+        try:
+            self.job(self)
+        except Exception as e:
+            self.failed.emit(str(e))
+        self.finished.emit(self.is_cancelled())
+
+    def is_cancelled(self):
+        return self.thread().isInterruptionRequested()
+
+
+class WorkerHostMixin:
+    # Запуск BatchWorker в отдельном QThread и его отмена
+    _thread = None
+    _worker = None
+    job_failed = False
+
+    def start_worker(self, job, on_progress, on_finished, on_file_done=None):
+        thread = QThread(self)
+        worker = BatchWorker(job)
+        worker.moveToThread(thread)
+
+        thread.started.connect(worker.run)
+        worker.progress.connect(on_progress)
+        if on_file_done is not None:
+            worker.file_done.connect(on_file_done)
+        worker.failed.connect(self._worker_failed)
+        worker.finished.connect(on_finished)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(self._worker_stopped)
+
+        self._thread = thread
+        self._worker = worker
+        self.job_failed = False
+        thread.start()
+
+    def _worker_failed(self, message):
+        self.job_failed = True
+        QMessageBox.critical(self, "Ошибка", message)
+
+    def _worker_stopped(self):
+        self._worker.deleteLater()
+        self._thread.deleteLater()
+        self._worker = None
+        self._thread = None
+
+    def is_busy(self):
+        return self._thread is not None
+
+    def cancel_worker(self):
+        if self._thread is not None:
+            self._thread.requestInterruption()
+
+    def stop_worker(self):
+        if self._thread is not None:
+            self._thread.requestInterruption()
+            self._thread.wait()
+
+
+class CompetencySplitterTab(WorkerHostMixin, QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
@@ -72,6 +96,34 @@ class CompetencySplitterTab(QWidget):
         self.button = QPushButton("Выбрать файлы Word (.docx)", self)
         self.button.clicked.connect(self.process_files)
 
+        self.check_button = QPushButton("Проверить файлы без разрезания", self)
+        self.check_button.clicked.connect(self.check_files)
+
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("Число параллельных процессов:", self)
+        self.workers_input = QSpinBox(self)
+        self.workers_input.setRange(1, os.cpu_count() or 1)
+        self.workers_input.setValue(os.cpu_count() or 1)
+        workers_layout.addWidget(workers_label)
+        workers_layout.addWidget(self.workers_input)
+        workers_layout.addStretch()
+
+        # Архив уменьшает число создаваемых файлов: на сетевом диске это
+        # заметно быстрее тысяч отдельных документов
+        archive_layout = QHBoxLayout()
+        archive_label = QLabel("Сохранение результатов:", self)
+        self.archive_input = QComboBox(self)
+        self.archive_input.addItem("Отдельными файлами", None)
+        self.archive_input.addItem("Одним архивом с отчетом", 'batch')
+        self.archive_input.addItem("Архивом на каждый исходный файл", 'file')
+        archive_layout.addWidget(archive_label)
+        archive_layout.addWidget(self.archive_input)
+        archive_layout.addStretch()
+
+        self.cancel_button = QPushButton("Отмена", self)
+        self.cancel_button.clicked.connect(self.cancel_batch)
+        self.cancel_button.setVisible(False)
+
         self.progress = QProgressBar(self)
         self.progress.setAlignment(Qt.AlignCenter)
         self.progress.setVisible(False)
@@ -79,220 +131,128 @@ class CompetencySplitterTab(QWidget):
         self.status_label = QLabel("", self)
         self.status_label.setAlignment(Qt.AlignCenter)
 
+        layout.addLayout(workers_layout)
+        layout.addLayout(archive_layout)
         layout.addWidget(self.button)
+        layout.addWidget(self.check_button)
+        layout.addWidget(self.cancel_button)
         layout.addWidget(self.progress)
         layout.addWidget(self.status_label)
         self.setLayout(layout)
 
     def process_files(self):
+        self.start_batch(dry_run=False)
+
+    def check_files(self):
+        # Пробный проход: те же проверки, что и при разрезании, но без записи файлов
+        self.start_batch(dry_run=True)
+
+    def start_batch(self, dry_run):
         files, _ = QFileDialog.getOpenFileNames(self, "Выберите Word-файлы", "", "Word Files (*.docx)")
         if not files:
             return
 
-        result_dir = QFileDialog.getExistingDirectory(self, "Выберите папку для сохранения результатов")
+        if dry_run:
+            title = "Выберите папку для отчета о проверке"
+        else:
+            title = "Выберите папку для сохранения результатов"
+        result_dir = QFileDialog.getExistingDirectory(self, title)
         if not result_dir:
             QMessageBox.warning(self, "Отмена", "Операция отменена.")
             return
 
-        success_dir = os.path.join(result_dir, "Успешно разрезанные ФОС")
-        failed_dir = os.path.join(result_dir, "Не форматные исходные файлы ФОС")
-        os.makedirs(success_dir, exist_ok=True)
-        os.makedirs(failed_dir, exist_ok=True)
-
-        wb = Workbook()
-        ws = wb.active
-        ws.append(["Наименование файла", "Тип ошибки", "Строка с ошибкой"])
+        self.processed_count = 0
+        self.failed_count = 0
+        self.dry_run = dry_run
+        self.result_dir = result_dir
+        self.archive = self.archive_input.currentData()
 
         self.progress.setMaximum(len(files))
         self.progress.setValue(0)
         self.progress.setVisible(True)
-        self.status_label.setText("Начата обработка файлов...")
-
-        QApplication.processEvents()
-
-        for idx, file_path in enumerate(files, start=1):
-            filename = os.path.basename(file_path)
-            self.status_label.setText(f"Обрабатывается файл: {filename}")
-            QApplication.processEvents()
-
-            doc = Document(file_path)
+        self.status_label.setText("Начата проверка файлов..." if dry_run else "Начата обработка файлов...")
+        self.button.setEnabled(False)
+        self.check_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.setVisible(True)
+
+        from splitter_core import run_batch
+
+        workers = self.workers_input.value()
+        archive = self.archive
+        self.start_worker(
+            lambda worker: run_batch(
+                files, result_dir, workers,
+                worker.progress.emit, worker.file_done.emit, worker.is_cancelled,
+                dry_run, archive
+            ),
+            self.on_batch_progress,
+            self.on_batch_finished,
+            self.on_file_done,
+        )
 
-            for table in doc.tables:
-                self.set_table_borders(table)
+    def cancel_batch(self):
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("Отмена: обработка остановится после текущего файла...")
+        self.cancel_worker()
 
-            validator = FileValidator(doc, filename)
-            if validator.validate():
-                try:
-                    self.process_file(doc, filename, success_dir)
-                except Exception as e:
-                    ws.append([filename, "Ошибка обработки компетенций", str(e)])
-                    shutil.copy(file_path, failed_dir)
-            else:
-                for err in validator.errors:
-                    ws.append([filename, err["Тип ошибки"], err["Строка"]])
-                shutil.copy(file_path, failed_dir)
+    def on_batch_progress(self, value, text):
+        self.progress.setValue(value)
+        self.status_label.setText(text)
 
-            self.progress.setValue(idx)
-            QApplication.processEvents()
+    def on_file_done(self, filename, ok):
+        self.processed_count += 1
+        if not ok:
+            self.failed_count += 1
 
-        wb.save(os.path.join(failed_dir, "Отчет_ошибок.xlsx"))
+    def on_batch_finished(self, cancelled):
         self.progress.setVisible(False)
-        self.status_label.setText("Обработка завершена.")
-        QMessageBox.information(self, "Готово", "Все файлы обработаны.")
-
-    def process_file(self, original_doc, original_filename, output_dir):
-        tables = original_doc.tables
-        first_table = tables[0]
-        second_table = tables[1]
-
-        competencies = []
-        for row in first_table.rows[1:]:
-            code = row.cells[0].text.strip().replace(" ", "")
-            competencies.append({'code': code, 'row': row})
-
-        per_list_start = None
-        for i, para in enumerate(original_doc.paragraphs):
-            if "Перечень заданий" in para.text:
-                per_list_start = i
-                break
-
-        if per_list_start is None:
-            raise Exception("Раздел 'Перечень заданий' не найден")
-
-        document_elements = list(original_doc.element.body[per_list_start + 1:])
-        competency_code_pattern = re.compile(r'^[A-ZА-Я]+\s*-\s*\d+', re.IGNORECASE)
-
-        task_rows = []
-        for row in second_table.rows[1:]:
-            num_text = row.cells[0].text.strip()
-            try:
-                num = int(num_text.replace(".", "").strip())
-                task_rows.append((num, row))
-            except ValueError:
-                continue
-
-        for comp in competencies:
-            copying = False
-            current_elements = []
-
-            for el in document_elements:
-                if el.tag.endswith('p'):
-                    p = self._element_to_paragraph(el)
-                    txt = p.text.strip().replace(" ", "")
-                    if txt == comp['code']:
-                        copying = True
-                        continue
-                    elif competency_code_pattern.match(txt) and copying:
-                        break
-                if copying:
-                    current_elements.append(el)
-
-            instruction_pattern = re.compile(r'^(\d+)\.\s*(Инструкция:|Фабула:)')
-            instruction_numbers = []
-            for el in current_elements:
-                if el.tag.endswith('p'):
-                    p = self._element_to_paragraph(el)
-                    text = p.text.strip()
-                    m = instruction_pattern.match(text)
-                    if m:
-                        instruction_numbers.append(int(m.group(1)))
-
-            num_text = comp['row'].cells[-1].text.strip()
-            m = re.match(r'(\d+)-(\d+)', num_text)
-            if not m:
-                raise Exception(
-                    f"Компетенция {comp['code']}: неверный формат диапазона номеров '{num_text}' (должно быть например - 1-16)"
-                )
-            start = int(m.group(1))
-            end = int(m.group(2))
-            expected_count = end - start + 1
-
-            if len(instruction_numbers) != expected_count:
-                raise Exception(
-                    f"Компетенция {comp['code']}: количество заданий ({len(instruction_numbers)}) "
-                    f"не совпадает с ожидаемым ({expected_count})"
-                )
+        self.button.setEnabled(True)
+        self.check_button.setEnabled(True)
+        self.cancel_button.setVisible(False)
+        if self.dry_run:
+            self.on_check_finished(cancelled)
+            return
+        summary = (
+            f"Обработано файлов: {self.processed_count}, "
+            f"из них с ошибками: {self.failed_count}."
+        )
+        if self.archive == 'batch':
+            from splitter_core import archive_path
+
+            summary += f"\nРезультаты и отчет в архиве:\n{archive_path(self.result_dir)}"
+        if self.job_failed:
+            self.status_label.setText("Обработка остановлена из-за ошибки.")
+        elif cancelled:
+            self.status_label.setText("Обработка прервана.")
+            QMessageBox.information(self, "Прервано", f"Обработка прервана.\n{summary}")
+        else:
+            self.status_label.setText("Обработка завершена.")
+            QMessageBox.information(self, "Готово", f"Все файлы обработаны.\n{summary}")
+
+    def on_check_finished(self, cancelled):
+        from splitter_core import report_path
+
+        summary = (
+            f"Проверено файлов: {self.processed_count}, "
+            f"без ошибок: {self.processed_count - self.failed_count}, "
+            f"с ошибками: {self.failed_count}.\n"
+            f"Отчет: {report_path(self.result_dir, dry_run=True)}"
+        )
+        if self.job_failed:
+            self.status_label.setText("Проверка остановлена из-за ошибки.")
+        elif cancelled:
+            self.status_label.setText("Проверка прервана.")
+            QMessageBox.information(self, "Прервано", f"Проверка прервана.\n{summary}")
+        else:
+            self.status_label.setText("Проверка завершена.")
+            QMessageBox.information(self, "Проверка завершена", summary)
 
-            new_doc = Document()
-
-            t1 = new_doc.add_table(rows=1, cols=len(first_table.columns))
-            for i, c in enumerate(first_table.rows[0].cells):
-                t1.rows[0].cells[i].text = c.text
-            r = t1.add_row()
-            for i, c in enumerate(comp['row'].cells):
-                r.cells[i].text = c.text
-            self.set_table_borders(t1)
-
-            new_doc.add_paragraph("\n")
-
-            nums = list(range(start, end + 1))
-            t2 = new_doc.add_table(rows=1, cols=len(second_table.columns))
-            for i, c in enumerate(second_table.rows[0].cells):
-                t2.rows[0].cells[i].text = c.text
-            for n, r in task_rows:
-                if n in nums:
-                    row = t2.add_row()
-                    for i, c in enumerate(r.cells):
-                        row.cells[i].text = c.text
-            self.set_table_borders(t2)
-
-            new_doc.add_paragraph("\n")
-            heading = new_doc.add_paragraph("Перечень заданий")
-            heading.style = 'Heading 2'
-            new_doc.add_paragraph("\n")
-
-            for el in current_elements:
-                new_doc.element.body.append(deepcopy(el))
-
-            filename = f"{comp['code']}_{original_filename}"
-            new_doc.save(os.path.join(output_dir, filename))
-
-    def set_table_borders(self, table):
-        tbl = table._tbl
-        tblPr = tbl.tblPr
-        if tblPr is None:
-            tblPr = OxmlElement('w:tblPr')
-            tbl.insert(0, tblPr)
-
-        existing_borders = tblPr.find(qn('w:tblBorders'))
-        if existing_borders is not None:
-            tblPr.remove(existing_borders)
-
-        tblBorders = OxmlElement('w:tblBorders')
-
-        borders = [
-            ('top', 'single', 4, '000000'),
-            ('left', 'single', 4, '000000'),
-            ('bottom', 'single', 4, '000000'),
-            ('right', 'single', 4, '000000'),
-            ('insideH', 'single', 4, '000000'),
-            ('insideV', 'single', 4, '000000')
-        ]
-
-        for border_type, border_style, border_size, border_color in borders:
-            border = OxmlElement(f'w:{border_type}')
-            border.set(qn('w:val'), border_style)
-            border.set(qn('w:sz'), str(border_size))
-            border.set(qn('w:space'), '0')
-            border.set(qn('w:color'), border_color)
-            tblBorders.append(border)
-
-        tblPr.append(tblBorders)
-
-    def _element_to_paragraph(self, element):
-        from docx.oxml import parse_xml
-        from docx.text.paragraph import Paragraph
-        return Paragraph(parse_xml(element.xml), None)
-
-
-class SummaryBuilderTab(QWidget):
+
+class SummaryBuilderTab(WorkerHostMixin, QWidget):
     def __init__(self):
         super().__init__()
-        self.comp_order = {'УК': 1, 'ОПК': 2, 'ПК': 3}
-        self.summary_data = []
-        self.all_tasks = []
-        self.task_mapping = {}
-        self.comp_indicators = {}
+        self.builder = None
         self.selected_folder = None
         self.init_ui()
 
@@ -407,6 +367,13 @@ class SummaryBuilderTab(QWidget):
         self.build_btn.clicked.connect(self.build_summary)
         self.build_btn.setEnabled(False)
 
+        # Кнопка отмены
+        self.cancel_btn = QPushButton("Отмена")
+        self.cancel_btn.setFont(font)
+        self.cancel_btn.setStyleSheet(button_style)
+        self.cancel_btn.clicked.connect(self.cancel_job)
+        self.cancel_btn.setVisible(False)
+
         # Прогресс-бар
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -433,6 +400,7 @@ class SummaryBuilderTab(QWidget):
         layout.addLayout(form_layout)
         layout.addLayout(folder_selection_layout)
         layout.addWidget(self.build_btn)
+        layout.addWidget(self.cancel_btn)
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.status_label)
 
@@ -449,494 +417,106 @@ class SummaryBuilderTab(QWidget):
             self.select_btn.style().polish(self.select_btn)
             self.select_btn.setText("✓ Папка выбрана")
             self.folder_path_label.setText(f"Выбрано: {dir_path}")
-            self.build_btn.setEnabled(True)
-            self.process_directory(dir_path)
-            QMessageBox.information(self, "Успех",
-                                  f"Обработано {len(self.summary_data)} дисциплин!\n"
-                                  "Теперь можно построить сводный файл.")
+            self.build_btn.setEnabled(False)
+
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setMinimum(0)
+            self.progress_bar.setMaximum(0)
+            self.progress_bar.setFormat("Чтение файлов...")
+            self.status_label.setText("")
+            self.set_busy(True)
+
+            if self.builder is None:
+                from summary_core import SummaryBuilder
+                self.builder = SummaryBuilder()
+            self.start_worker(
+                lambda worker: self.builder.process_directory(
+                    dir_path, worker.progress.emit, worker.is_cancelled
+                ),
+                self.on_job_progress,
+                self.on_directory_processed,
+            )
 
-    def process_directory(self, dir_path):
-        self.summary_data = []
-        self.all_tasks = []
-        self.comp_indicators = {}
+    def set_busy(self, busy):
+        self.select_btn.setEnabled(not busy)
+        self.build_btn.setEnabled(
+            not busy and self.builder is not None and bool(self.builder.summary_data)
+        )
+        self.cancel_btn.setEnabled(busy)
+        self.cancel_btn.setVisible(busy)
 
-        docx_files = [f for f in os.listdir(dir_path) if f.endswith('.docx')]
+    def cancel_job(self):
+        self.cancel_btn.setEnabled(False)
+        self.status_label.setText("Отмена: работа остановится после текущего файла...")
+        self.cancel_worker()
 
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setMinimum(0)
-        self.progress_bar.setMaximum(0)
-        self.progress_bar.setFormat("Чтение файлов...")
-        self.status_label.setText("")
-        QApplication.processEvents()
-
-        for i, filename in enumerate(docx_files, start=1):
-            self.status_label.setText(f"Обрабатывается файл {i} из {len(docx_files)}: {filename}")
-            QApplication.processEvents()
-            file_path = os.path.join(dir_path, filename)
-            self.process_competency_file(file_path)
+    def on_job_progress(self, value, text):
+        if self.progress_bar.maximum():
+            self.progress_bar.setValue(value)
+        self.status_label.setText(text)
 
+    def on_directory_processed(self, cancelled):
         self.progress_bar.setVisible(False)
         self.status_label.setText("")
-
-    def process_competency_file(self, file_path):
-        doc = Document(file_path)
-        comp_code = os.path.basename(file_path).split('_')[0]
-
-        if len(doc.tables) >= 2:
-            first_table = doc.tables[0]
-
-            indicators_text = ""
-            header_cells = first_table.rows[0].cells
-            indicator_col_idx = None
-            for idx, cell in enumerate(header_cells):
-                if "Наименование индикаторов" in cell.text:
-                    indicator_col_idx = idx
-                    break
-
-            if indicator_col_idx is not None:
-                indicator_parts = []
-                for row in first_table.rows[1:]:
-                    text = row.cells[indicator_col_idx].text.strip()
-                    if text and text not in indicator_parts:
-                        indicator_parts.append(text)
-                indicators_text = "\n".join(indicator_parts).strip()
-
-            if indicators_text:
-                self.comp_indicators[comp_code] = indicators_text
-
-            for row_idx, row in enumerate(first_table.rows):
-                if row_idx == 0:
-                    continue
-                cells = row.cells
-                if len(cells) < 6:
-                    continue
-                discipline = cells[3].text.strip()
-                semester = cells[4].text.strip()
-                tasks = cells[5].text.strip()
-
-                self.summary_data.append({
-                    'comp_code': comp_code,
-                    'discipline': discipline,
-                    'semester': semester,
-                    'tasks': tasks,
-                    'file_path': file_path
-                })
-
-            second_table = doc.tables[1]
-            for row_idx, row in enumerate(second_table.rows):
-                if row_idx == 0:
-                    continue
-                cells = row.cells
-                if len(cells) < 6:
-                    continue
-                if re.match(r'^\d+\.', cells[0].text.strip()):
-                    self.all_tasks.append({
-                        'file_path': file_path,
-                        'original_num': cells[0].text.strip().split('.')[0],
-                        'text': cells[0].text.strip(),
-                        'cells': [cell.text.strip() for cell in cells]
-                    })
-
-        tasks_section = []
-        found_section = False
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            if "Перечень заданий" in text:
-                found_section = True
-                continue
-            if found_section and text:
-                tasks_section.append(text)
-
-        if tasks_section:
-            task_text = "\n".join(tasks_section)
-            self.all_tasks.append({
-                'file_path': file_path,
-                'text': task_text,
-                'is_text_section': True
-            })
+        if cancelled or self.job_failed:
+            # Неполные данные не годятся для сводного файла
+            self.builder = None
+            self.set_busy(False)
+            if cancelled:
+                QMessageBox.information(self, "Прервано", "Чтение файлов компетенций прервано.")
+            return
+        self.set_busy(False)
+        QMessageBox.information(self, "Успех",
+                              f"Обработано {len(self.builder.summary_data)} дисциплин!\n"
+                              "Теперь можно построить сводный файл.")
 
     def build_summary(self):
-        if not self.summary_data or not self.all_tasks:
+        if self.builder is None or not self.builder.has_data():
             QMessageBox.warning(self, "Ошибка", "Нет данных для построения сводного файла")
             return
 
-        sorted_data = sorted(
-            self.summary_data,
-            key=lambda x: (
-                self.get_comp_order(x['comp_code']),
-                self.parse_semester(x['semester']),
-                x['discipline']
-            )
-        )
-
-        summary_doc = Document()
-        self.add_template_header(summary_doc)
-        self.add_first_table(summary_doc, sorted_data)
-        self.add_second_table(summary_doc, sorted_data)
-        self.add_tasks_list(summary_doc, sorted_data)
-
-        # Создаем таблицу сопоставления
-        mapping_data = self.create_mapping_table(sorted_data)
-
         save_path, _ = QFileDialog.getSaveFileName(
             self, "Сохранить сводный файл", "", "Word Files (*.docx)"
         )
-        if save_path:
-            summary_doc.save(save_path)
-
-            # Сохраняем таблицу сопоставления в отдельный файл
-            mapping_path = os.path.join(os.path.dirname(save_path),
-                                        "Сопоставление_номеров_заданий.xlsx")
-            self.save_mapping_table(mapping_data, mapping_path)
-
-            QMessageBox.information(
-                self, "Готово",
-                f"Сводный файл успешно создан:\n{save_path}\n\n"
-                f"Таблица сопоставления сохранена:\n{mapping_path}"
-            )
+        if not save_path:
+            return
 
-    def create_mapping_table(self, sorted_data):
-        mapping_data = []
-
-        for disc in sorted_data:
-            source_doc = Document(disc['file_path'])
-            found_section = False
-            current_num = self.task_mapping[disc['file_path']]['start']
-            filename = os.path.basename(disc['file_path'])
-
-            for element in source_doc.element.body:
-                if element.tag.endswith('p'):
-                    paragraph = Paragraph(element, source_doc)
-                    text = paragraph.text.strip()
-
-                    if "Перечень заданий" in text:
-                        found_section = True
-                        continue
-
-                    if found_section and text:
-                        match = re.match(r'^(\d+)\.\s*(Инструкция:|Фабула:)', text)
-                        if match:
-                            original_num = match.group(1)
-                            mapping_data.append({
-                                'Исходный файл': filename,
-                                'Исходный номер': original_num,
-                                'Номер в сводном файле': current_num,
-                                'Дисциплина': disc['discipline'],
-                                'Компетенция': disc['comp_code']
-                            })
-                            current_num += 1
-
-        return mapping_data
-
-    def save_mapping_table(self, mapping_data, file_path):
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Сопоставление номеров"
-
-        # Заголовки
-        headers = [
-            'Исходный файл',
-            'Исходный номер',
-            'Номер в сводном файле',
-            'Дисциплина',
-            'Компетенция'
-        ]
-        ws.append(headers)
-
-        # Данные
-        for row in mapping_data:
-            ws.append([
-                row['Исходный файл'],
-                row['Исходный номер'],
-                row['Номер в сводном файле'],
-                row['Дисциплина'],
-                row['Компетенция']
-            ])
-
-        # Форматирование
-        for col in range(1, len(headers) + 1):
-            ws.cell(row=1, column=col).font = Font(bold=True)
-            ws.column_dimensions[get_column_letter(col)].width = 25
-
-        wb.save(file_path)
-
-    def add_template_header(self, doc):
-        def add_centered_bold_paragraph(text):
-            p = doc.add_paragraph()
-            p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            p.paragraph_format.line_spacing = 1  # межстрочный интервал
-            p.paragraph_format.space_before = Pt(0)  # интервал перед
-            p.paragraph_format.space_after = Pt(0)  # интервал после
-
-            run = p.add_run(text)
-            run.bold = True
-            font = run.font
-            font.name = 'Times New Roman'
-            font.size = Pt(12)
-            font.color.rgb = RGBColor(0, 0, 0)
-            r = run._element
-            r.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-            return p
-
-        add_centered_bold_paragraph('Фонд оценочных средств')
-
-        direction = self.direction_input.text().strip() or "____________________"
-        profile = self.profile_input.text().strip() or "____________________"
-        year = self.year_input.text().strip() or "20__"
-
-        add_centered_bold_paragraph('для оценки остаточных знаний обучающихся по направлению подготовки')
-        add_centered_bold_paragraph(f'Направление: {direction}')
-        add_centered_bold_paragraph(f'Профиль: {profile}')
-        add_centered_bold_paragraph(f'Год начала подготовки – {year}')
-        doc.add_paragraph()
-
-    def add_first_table(self, doc, sorted_data):
-        doc.add_heading('Распределение тестовых заданий по компетенциям и дисциплинам', level=2)
-        table = doc.add_table(rows=1, cols=6)
-        table.style = 'Table Grid'
-        table.alignment = WD_TABLE_ALIGNMENT.CENTER
-
-        # Заголовки таблицы (выравнивание по центру)
-        headers = table.rows[0].cells
-        headers[0].text = "Код компетенции"
-        headers[1].text = "Наименование компетенции"
-        headers[2].text = "Наименование индикаторов"
-        headers[3].text = "Наименование дисциплины/модуля/практики"
-        headers[4].text = "Семестр"
-        headers[5].text = "Номер задания"
-
-        for cell in headers:
-            for paragraph in cell.paragraphs:
-                paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                for run in paragraph.runs:
-                    run.bold = True
-
-        current_task_num = 1
-        comp_groups = defaultdict(list)
-        for disc in sorted_data:
-            comp_groups[disc['comp_code']].append(disc)
-
-        row_idx = 1
-        for comp_code, disciplines in comp_groups.items():
-            start_row = row_idx
-            for disc in disciplines:
-                row_cells = table.add_row().cells
-                row_cells[0].text = comp_code if row_idx == start_row else ""
-                row_cells[1].text = ""
-                row_cells[2].text = (
-                    self.comp_indicators.get(comp_code, "")
-                    if row_idx == start_row else ""
+        from summary_core import MAPPING_NAME
+
+        # Значения полей читаются здесь: виджеты недоступны из рабочего потока
+        direction = self.direction_input.text().strip()
+        profile = self.profile_input.text().strip()
+        year = self.year_input.text().strip()
+        mapping_path = os.path.join(os.path.dirname(save_path), MAPPING_NAME)
+
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setMinimum(0)
+        self.progress_bar.setMaximum(0)
+        self.progress_bar.setFormat("Построение сводного файла...")
+        self.set_busy(True)
+
+        def on_finished(cancelled):
+            self.progress_bar.setVisible(False)
+            self.status_label.setText("")
+            self.set_busy(False)
+            if cancelled:
+                QMessageBox.information(self, "Прервано", "Построение сводного файла прервано.")
+                return
+            if not self.job_failed:
+                QMessageBox.information(
+                    self, "Готово",
+                    f"Сводный файл успешно создан:\n{save_path}\n\n"
+                    f"Таблица сопоставления сохранена:\n{mapping_path}"
                 )
-                row_cells[3].text = disc['discipline']
-                row_cells[4].text = disc['semester']
-
-                task_count = self.calculate_task_count(disc['tasks'])
-                row_cells[5].text = f"{current_task_num}-{current_task_num + task_count - 1}"
-
-                # Выравнивание всего текста в ячейках по левому краю
-                for cell in row_cells:
-                    for paragraph in cell.paragraphs:
-                        paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-
-                self.task_mapping[disc['file_path']] = {
-                    'discipline': disc['discipline'],
-                    'start': current_task_num,
-                    'end': current_task_num + task_count - 1,
-                    'tasks': []
-                }
-
-                current_task_num += task_count
-                row_idx += 1
-
-            if len(disciplines) > 1:
-                for col in [0, 1, 2]:
-                    cell_to_merge = table.cell(start_row, col)
-                    for r in range(start_row + 1, row_idx):
-                        cell_to_merge.merge(table.cell(r, col))
-                    for paragraph in cell_to_merge.paragraphs:
-                        paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-
-    def add_second_table(self, doc, sorted_data):
-        doc.add_heading('Распределение заданий по типам и уровням сложности', level=2)
-        doc.add_heading('Ключи к оцениванию', level=3)
-
-        table = doc.add_table(rows=1, cols=6)
-        table.style = 'Table Grid'
-        table.alignment = WD_TABLE_ALIGNMENT.CENTER
-
-        # Заголовки таблицы (выравнивание по центру)
-        headers = table.rows[0].cells
-        headers[0].text = "№ задания"
-        headers[1].text = "Верный ответ"
-        headers[2].text = "Критерии"
-        headers[3].text = "Тип задания"
-        headers[4].text = "Уровень сложности"
-        headers[5].text = "Время выполнения (мин.)"
-
-        for cell in headers:
-            for paragraph in cell.paragraphs:
-                paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                for run in paragraph.runs:
-                    run.bold = True
-
-        tasks_by_file = defaultdict(list)
-        for task in self.all_tasks:
-            if not task.get('is_text_section'):
-                tasks_by_file[task['file_path']].append(task)
-
-        current_task_num = 1
-
-        for disc in sorted_data:
-            # Заголовок дисциплины (выравнивание по центру)
-            row = table.add_row().cells
-            row[0].merge(row[5])
-            row[0].text = disc['discipline']
-            for paragraph in row[0].paragraphs:
-                paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                for run in paragraph.runs:
-                    run.bold = True
-
-            file_tasks = tasks_by_file.get(disc['file_path'], [])
-            task_count_in_first_table = (
-                    self.task_mapping[disc['file_path']]['end'] -
-                    self.task_mapping[disc['file_path']]['start'] + 1
-            )
 
-            for idx in range(task_count_in_first_table):
-                row_cells = table.add_row().cells
-                new_num = current_task_num + idx
-                row_cells[0].text = str(new_num)
-
-                if idx < len(file_tasks):
-                    task = file_tasks[idx]
-                    for i in range(1, min(6, len(task['cells']))):
-                        row_cells[i].text = task['cells'][i]
-                else:
-                    for i in range(1, 6):
-                        row_cells[i].text = "—"
-
-                # Выравнивание всего текста в ячейках по левому краю
-                for cell in row_cells:
-                    for paragraph in cell.paragraphs:
-                        paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-
-            current_task_num += task_count_in_first_table
-
-    def add_tasks_list(self, doc, sorted_data):
-        doc.add_heading('Перечень заданий', level=2)
-
-        for disc in sorted_data:
-            source_doc = Document(disc['file_path'])
-            found_section = False
-            current_num = self.task_mapping[disc['file_path']]['start']
-
-            doc.add_heading(disc['discipline'], level=3)
-
-            for element in source_doc.element.body:
-                if element.tag.endswith('p'):
-                    paragraph = Paragraph(element, source_doc)
-                    text = paragraph.text.strip()
-
-                    if "Перечень заданий" in text:
-                        found_section = True
-                        continue
-
-                    if found_section and text:
-                        match = re.match(r'^(\d+)\.\s*(Инструкция:|Фабула:)', text)
-                        if match:
-                            old_num = match.group(1)
-                            new_text = re.sub(r'^(\d+)\.', f'{current_num}.', text, count=1)
-                            new_paragraph = doc.add_paragraph()
-                            new_paragraph.add_run(new_text).bold = True
-                            current_num += 1
-                        else:
-                            new_paragraph = doc.add_paragraph()
-                            for run in paragraph.runs:
-                                new_run = new_paragraph.add_run(run.text)
-                                new_run.bold = run.bold
-                                new_run.italic = run.italic
-                                new_run.underline = run.underline
-                                if run.font.size:
-                                    new_run.font.size = run.font.size
-
-                elif element.tag.endswith('tbl'):
-                    if found_section:
-                        table = Table(element, source_doc)
-                        new_table = doc.add_table(rows=len(table.rows), cols=len(table.columns))
-                        new_table.style = 'Table Grid'
-
-                        for i, row in enumerate(table.rows):
-                            for j, cell in enumerate(row.cells):
-                                new_cell = new_table.cell(i, j)
-                                new_cell.text = ''
-                                for paragraph in cell.paragraphs:
-                                    new_paragraph = new_cell.add_paragraph()
-                                    for run in paragraph.runs:
-                                        new_run = new_paragraph.add_run(run.text)
-                                        new_run.bold = run.bold
-                                        new_run.italic = run.italic
-                                        new_run.underline = run.underline
-                                        if run.font.size:
-                                            new_run.font.size = run.font.size
-
-                elif element.tag.endswith('drawing'):
-                    if found_section:
-                        for rel in source_doc.part.rels.values():
-                            if "image" in rel.target_ref:
-                                image_part = rel.target_part
-                                image_bytes = image_part.blob
-                                doc.add_picture(io.BytesIO(image_bytes))
-                                doc.add_paragraph()
-
-    def merge_cells(self, table, start_row, end_row, col_idx):
-        cell_start = table.cell(start_row, col_idx)
-        for row in range(start_row + 1, end_row + 1):
-            cell_next = table.cell(row, col_idx)
-            cell_start.merge(cell_next)
-
-    def get_comp_order(self, code):
-        match = re.match(r'([А-Я]+)-(\d+)', code)
-        if match:
-            comp_type = match.group(1)
-            comp_num = int(match.group(2))
-            return (self.comp_order.get(comp_type, 99), comp_num)
-        return (99, 99)
-
-    def parse_semester(self, semester_str):
-        try:
-            clean_str = re.sub(r'[^\d,-]', '', semester_str)
-
-            # Если есть запятые (несколько семестров)
-            if ',' in clean_str:
-                semesters = [int(s.strip()) for s in clean_str.split(',') if s.strip()]
-                return min(semesters) + 0.5  # Добавляем 0.5, чтобы диапазон был после одиночного семестра
-
-            # Если есть дефис (диапазон)
-            elif '-' in clean_str:
-                parts = clean_str.split('-')
-                if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
-                    return int(parts[0]) + 0.5  # Добавляем 0.5, чтобы диапазон был после одиночного семестра
-
-            # Одиночный семестр
-            elif clean_str.isdigit():
-                return int(clean_str)
-
-            return 0
-        except ValueError:
-            return 0
-
-    def calculate_task_count(self, tasks_str):
-        clean_str = re.sub(r'[^\d,-]', '', tasks_str)
-        if '-' in clean_str:
-            parts = clean_str.split('-')
-            if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
-                return int(parts[1]) - int(parts[0]) + 1
-        elif ',' in clean_str:
-            return len(clean_str.split(','))
-        try:
-            return int(clean_str)
-        except ValueError:
-            return 0
+        self.start_worker(
+            lambda worker: self.builder.write_summary(
+                save_path, mapping_path, direction, profile, year,
+                worker.progress.emit, worker.is_cancelled
+            ),
+            self.on_job_progress,
+            on_finished,
+        )
 
 
 class MainWindow(QWidget):
@@ -947,18 +527,37 @@ class MainWindow(QWidget):
 
         layout = QVBoxLayout()
 
-        tabs = QTabWidget()
+        self.tabs = QTabWidget()
         self.splitter_tab = CompetencySplitterTab()
-        self.builder_tab = SummaryBuilderTab()
+        self.builder_tab = None
+        # Вкладка сборки создается при первом переходе на нее
+        self.builder_host = QWidget()
+        self.builder_host.setLayout(QVBoxLayout())
+        self.builder_host.layout().setContentsMargins(0, 0, 0, 0)
 
-        tabs.addTab(self.splitter_tab, "Разделение ФОС")
-        tabs.addTab(self.builder_tab, "Сборка сводного ФОС")
+        self.tabs.addTab(self.splitter_tab, "Разделение ФОС")
+        self.tabs.addTab(self.builder_host, "Сборка сводного ФОС")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
-        layout.addWidget(tabs)
+        layout.addWidget(self.tabs)
         self.setLayout(layout)
 
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.builder_host and self.builder_tab is None:
+            self.builder_tab = SummaryBuilderTab()
+            self.builder_host.layout().addWidget(self.builder_tab)
+
+    def closeEvent(self, event):
+        # Дожидаемся рабочих потоков: текущий файл дописывается до конца
+        self.splitter_tab.stop_worker()
+        if self.builder_tab is not None:
+            self.builder_tab.stop_worker()
+        event.accept()
+
 
 if __name__ == "__main__":
+    # Нужно для пула процессов в собранном exe под Windows
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
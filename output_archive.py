@@ -0,0 +1,65 @@
+import io
+import os
+import csv
+import zipfile
+
+
+# Выходные файлы одним архивом вместо тысяч мелких файлов: на сетевом диске
+# создание каждого файла обходится дороже, чем его содержимое. Записи
+# добавляются в архив последовательно, по мере готовности; документы docx
+# сами сжаты, поэтому в архиве они хранятся без повторного сжатия.
+# При закрытии в архив дописывается опись: что за файл, из какого
+# исходного получен и сколько занимает. Повтор имени (одноименные исходные
+# файлы из разных папок) получает номер: "файл (2).docx".
+
+MANIFEST_NAME = "Опись_архива.csv"
+MANIFEST_HEADER = ["Файл в архиве", "Исходный файл", "Содержимое", "Размер, байт"]
+
+
+class OutputArchive:
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED)
+        self._manifest = []
+        self._names = set()
+
+    def add_bytes(self, arcname, data, source="", kind=""):
+        arcname = self._free_name(arcname)
+        self._zip.writestr(arcname, data)
+        self._manifest.append([arcname, source, kind, len(data)])
+
+    def add_file(self, arcname, file_path, source="", kind=""):
+        arcname = self._free_name(arcname)
+        self._zip.write(file_path, arcname)
+        self._manifest.append([arcname, source, kind, os.path.getsize(file_path)])
+
+    def _free_name(self, arcname):
+        base, ext = os.path.splitext(arcname)
+        n = 1
+        while arcname in self._names:
+            n += 1
+            arcname = f"{base} ({n}){ext}"
+        self._names.add(arcname)
+        return arcname
+
+    def close(self):
+        manifest = io.StringIO()
+        writer = csv.writer(manifest, delimiter=';')
+        writer.writerow(MANIFEST_HEADER)
+        writer.writerows(self._manifest)
+        # utf-8-sig - чтобы Excel открыл опись с русскими буквами
+        self._zip.writestr(MANIFEST_NAME, manifest.getvalue().encode('utf-8-sig'),
+                           zipfile.ZIP_DEFLATED)
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def document_bytes(document):
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
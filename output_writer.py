@@ -0,0 +1,32 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Запись выходных документов в фоновых потоках. Сохранение docx
+# (сериализация XML, сжатие и запись на диск, часто сетевой) выполняется
+# пулом потоков, пока основной поток готовит следующую компетенцию.
+# Число еще не записанных документов ограничено: когда очередь заполнена,
+# save ждет освобождения места, и готовые документы не копятся в памяти.
+
+WRITER_THREADS = 2
+MAX_PENDING = 4
+
+
+class OutputWriter:
+    def __init__(self, threads=WRITER_THREADS, max_pending=MAX_PENDING):
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def save(self, document, path):
+        # Возвращает Future; ошибка записи поднимается из future.result()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(document.save, path)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        self._executor.shutdown()
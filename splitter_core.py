@@ -0,0 +1,670 @@
+import io
+import re
+import os
+import shutil
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from copy import deepcopy
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx_tables import add_table, table_texts
+from docx_stream import iter_body
+from docx_parts import OutputSkeleton, SourceParts
+from output_archive import OutputArchive, document_bytes
+from output_writer import OutputWriter
+from stage_timer import StageTimer, add_timing_sheet
+from xlsx_report import new_workbook, add_sheet, bold_row
+
+
+SUCCESS_DIR_NAME = "Успешно разрезанные ФОС"
+FAILED_DIR_NAME = "Не форматные исходные файлы ФОС"
+REPORT_NAME = "Отчет_ошибок.xlsx"
+REPORT_HEADER = ["Наименование файла", "Тип ошибки", "Строка с ошибкой"]
+CHECK_SHEET_TITLE = "Итог проверки"
+CHECK_HEADER = ["Наименование файла", "Результат", "Ошибок", "Предупреждений"]
+ARCHIVE_NAME = "Результаты_разрезания.zip"
+# Режимы архива: все результаты пакета в одном архиве
+# или по архиву на каждый исходный файл
+ARCHIVE_BATCH = 'batch'
+ARCHIVE_PER_FILE = 'file'
+
+
+_skeleton = None
+_writer = None
+_writer_pid = None
+
+
+class FileValidator:
+    # Проверяет первую таблицу документа: тексты ячеек по строкам
+    # (table_texts) или None, если таблиц нет. Таблица читается потоково
+    # (read_first_table), поэтому негодный файл отклоняется без построения
+    # объектной модели документа
+    def __init__(self, first_table, filename):
+        self.first_table = first_table
+        self.filename = filename
+        self.errors = []
+        self.code_pattern = re.compile(r'^[A-ZА-Я]+\s*-\s*\d+$')
+        self.range_pattern = re.compile(r'^\d+-\d+$')
+
+    def validate(self):
+        self.validate_competency_codes()
+        self.validate_task_numbers()
+        return not self.errors
+
+    def validate_competency_codes(self):
+        if self.first_table is None:
+            self.errors.append({"Тип ошибки": "Нет таблиц в документе", "Строка": ""})
+            return
+        for cells in self.first_table[1:]:
+            code = cells[0].strip()
+            if not self.code_pattern.match(code):
+                self.errors.append({
+                    "Тип ошибки": "Неверный формат кода компетенции",
+                    "Строка": code
+                })
+
+    def validate_task_numbers(self):
+        if self.first_table is None:
+            return
+        for cells in self.first_table[1:]:
+            num_text = cells[-1].strip()
+            if not self.range_pattern.match(num_text):
+                self.errors.append({
+                    "Тип ошибки": "Неверный формат диапазона номеров заданий",
+                    "Строка": num_text
+                })
+
+
+def read_first_table(file_path):
+    # Разбор document.xml останавливается на первой таблице верхнего уровня.
+    # Возвращает тексты ее ячеек (table_texts) или None
+    body = iter_body(file_path)
+    try:
+        for item in body:
+            if isinstance(item, Table):
+                return table_texts(item)
+        return None
+    finally:
+        body.close()
+
+
+def split_file(file_path, success_dir, failed_dir, dry_run=False, archive=None):
+    # Полный цикл для одного исходного файла: проверка, загрузка,
+    # разрезание и сохранение. Возвращает строки для отчета об ошибках,
+    # строки предупреждений (файл при этом разрезается), время этапов
+    # и выходные документы для общего архива. Функция не зависит от Qt
+    # и может выполняться в отдельном процессе. При dry_run выполняются
+    # только проверки: ни выходные файлы, ни копии отклоненных файлов
+    # не создаются.
+    # Выходные файлы записываются в фоне (output_writer); функция
+    # возвращается, когда все они записаны, и ошибки записи попадают
+    # в отчет под именем этого исходного файла.
+    # archive=ARCHIVE_BATCH - документы возвращаются парами (имя, байты),
+    # в общий архив их и отклоненный исходный файл добавляет run_batch;
+    # archive=ARCHIVE_PER_FILE - документы пишутся в архив рядом с папкой
+    # успешных под именем исходного файла
+    filename = os.path.basename(file_path)
+    rows = []
+    warnings = []
+    writes = []
+    outputs = []
+    timer = StageTimer()
+    rejected = False
+
+    def reject():
+        nonlocal rejected
+        if not dry_run and not rejected and archive != ARCHIVE_BATCH:
+            shutil.copy(file_path, failed_dir)
+        rejected = True
+
+    def save(document, path):
+        if archive is not None:
+            outputs.append((os.path.basename(path), document_bytes(document)))
+        else:
+            writes.append((path, output_writer().save(document, path)))
+
+    try:
+        with timer.stage("Проверка"):
+            first_table = read_first_table(file_path)
+            validator = FileValidator(first_table, filename)
+            valid = validator.validate()
+        if valid:
+            with timer.stage("Загрузка"):
+                doc = Document(file_path)
+    except Exception as e:
+        rows.append([filename, "Ошибка чтения файла", str(e)])
+        reject()
+        return rows, warnings, timer, outputs
+
+    if not valid:
+        for err in validator.errors:
+            rows.append([filename, err["Тип ошибки"], err["Строка"]])
+        reject()
+        return rows, warnings, timer, outputs
+
+    timer.count("Таблиц", len(doc.tables))
+    try:
+        # Первая таблица уже прочитана при проверке и заново не разбирается
+        if dry_run:
+            plan = plan_split(doc, timer, first_table)
+        else:
+            with timer.stage("Границы таблиц"):
+                for table in doc.tables:
+                    set_table_borders(table)
+            plan = process_file(doc, filename, success_dir, timer, first_table, save)
+    except Exception as e:
+        rows.append([filename, "Ошибка обработки компетенций", str(e)])
+        reject()
+    else:
+        for kind, text in plan['warnings']:
+            warnings.append([filename, kind, text])
+
+    with timer.stage("Ожидание записи"):
+        for path, future in writes:
+            try:
+                future.result()
+            except Exception as e:
+                rows.append([filename, "Ошибка записи файла", f"{os.path.basename(path)}: {e}"])
+                reject()
+
+    if rows:
+        # Отклоненный файл не оставляет частичных результатов: уже
+        # записанные выходные файлы удаляются, в архив они не попадают
+        for path, future in writes:
+            if future.exception() is None:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        outputs = []
+    elif archive == ARCHIVE_PER_FILE and outputs:
+        path = os.path.join(success_dir, os.path.splitext(filename)[0] + ".zip")
+        try:
+            with timer.stage("Запись архива"), OutputArchive(path) as zf:
+                for name, data in outputs:
+                    zf.add_bytes(name, data, filename, _output_kind(name))
+        except Exception as e:
+            rows.append([filename, "Ошибка записи файла", f"{os.path.basename(path)}: {e}"])
+            reject()
+            if os.path.exists(path):
+                os.remove(path)
+        outputs = []
+
+    return rows, warnings, timer, outputs
+
+
+def _output_kind(name):
+    # Имя выходного файла - "{код компетенции}_{исходный файл}"
+    return f"Компетенция {name.split('_')[0]}"
+
+
+def report_path(result_dir, dry_run=False):
+    # Отчет пробной проверки кладется прямо в папку результатов,
+    # потому что папки для файлов при проверке не создаются
+    if dry_run:
+        return os.path.join(result_dir, REPORT_NAME)
+    return os.path.join(result_dir, FAILED_DIR_NAME, REPORT_NAME)
+
+
+def archive_path(result_dir):
+    return os.path.join(result_dir, ARCHIVE_NAME)
+
+
+def run_batch(files, result_dir, workers=1, on_progress=None, on_file_done=None,
+              is_cancelled=None, dry_run=False, archive=None):
+    # Разрезание набора файлов. При workers > 1 файлы распределяются по пулу
+    # процессов; строки отчета собираются в порядке исходного списка файлов,
+    # поэтому отчет не зависит от порядка завершения задач.
+    # dry_run - пробная проверка всех файлов без записи результатов.
+    # archive=ARCHIVE_BATCH - результаты, отклоненные исходные файлы и отчет
+    # складываются в один архив (archive_path) с теми же папками внутри,
+    # ARCHIVE_PER_FILE - по архиву на исходный файл в папке успешных
+    success_dir = os.path.join(result_dir, SUCCESS_DIR_NAME)
+    failed_dir = os.path.join(result_dir, FAILED_DIR_NAME)
+    if dry_run:
+        archive = None
+    if dry_run or archive == ARCHIVE_BATCH:
+        os.makedirs(result_dir, exist_ok=True)
+    else:
+        os.makedirs(success_dir, exist_ok=True)
+        os.makedirs(failed_dir, exist_ok=True)
+
+    on_progress = on_progress or (lambda value, text: None)
+    on_file_done = on_file_done or (lambda filename, ok: None)
+    is_cancelled = is_cancelled or (lambda: False)
+    action = "Проверяется" if dry_run else "Обрабатывается"
+    done_action = "Проверен" if dry_run else "Обработан"
+
+    report_rows = {}
+    warning_rows = {}
+    timers = {}
+    batch_archive = OutputArchive(archive_path(result_dir)) if archive == ARCHIVE_BATCH else None
+
+    def collect(idx, result):
+        # Результаты добавляются в общий архив по мере готовности файлов
+        rows, warning_rows[idx], timers[idx], outputs = result
+        report_rows[idx] = rows
+        if batch_archive is not None:
+            file_path = files[idx - 1]
+            filename = os.path.basename(file_path)
+            for name, data in outputs:
+                batch_archive.add_bytes(
+                    f"{SUCCESS_DIR_NAME}/{name}", data, filename, _output_kind(name)
+                )
+            if rows:
+                batch_archive.add_file(
+                    f"{FAILED_DIR_NAME}/{filename}", file_path, filename, "Отклоненный исходный файл"
+                )
+        return rows
+
+    try:
+        if workers <= 1 or len(files) <= 1:
+            for idx, file_path in enumerate(files, start=1):
+                if is_cancelled():
+                    break
+
+                filename = os.path.basename(file_path)
+                on_progress(idx - 1, f"{action} файл: {filename}")
+                rows = collect(idx, split_file(file_path, success_dir, failed_dir, dry_run, archive))
+                on_file_done(filename, not rows)
+                on_progress(idx, f"{done_action} файл: {filename}")
+        else:
+            workers = min(workers, len(files))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # В работе не больше workers файлов: задачи, уже переданные
+                # в очередь пула, отменить нельзя, поэтому следующий файл
+                # отдается только после завершения предыдущего и только если
+                # пакет не отменен. При отмене запущенные файлы дорабатываются
+                pending_files = iter(enumerate(files, start=1))
+                futures = {}
+                on_progress(0, f"{action} файлов параллельно: {len(files)}")
+
+                done = 0
+                while True:
+                    while len(futures) < workers and not is_cancelled():
+                        item = next(pending_files, None)
+                        if item is None:
+                            break
+                        idx, file_path = item
+                        futures[executor.submit(
+                            split_file, file_path, success_dir, failed_dir, dry_run, archive
+                        )] = idx
+                    if not futures:
+                        break
+
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        # Завершенная задача сразу убирается: документы для архива
+                        # не держатся в памяти до конца пакета
+                        idx = futures.pop(future)
+                        filename = os.path.basename(files[idx - 1])
+                        rows = collect(idx, future.result())
+                        done += 1
+                        on_file_done(filename, not rows)
+                        on_progress(done, f"{done_action} файл: {filename}")
+
+        wb = new_workbook()
+        ws = add_sheet(wb)
+        ws.append(REPORT_HEADER)
+        for idx in sorted(report_rows):
+            for row in report_rows[idx] + warning_rows[idx]:
+                ws.append(row)
+        if dry_run:
+            add_check_summary_sheet(wb, files, report_rows, warning_rows)
+        add_timing_sheet(wb, [(os.path.basename(files[idx - 1]), timers[idx]) for idx in sorted(timers)])
+        if batch_archive is not None:
+            report = io.BytesIO()
+            wb.save(report)
+            batch_archive.add_bytes(
+                f"{FAILED_DIR_NAME}/{REPORT_NAME}", report.getvalue(), "", "Отчет об ошибках"
+            )
+        else:
+            wb.save(report_path(result_dir, dry_run))
+    finally:
+        if batch_archive is not None:
+            batch_archive.close()
+
+    return report_rows
+
+
+def add_check_summary_sheet(wb, files, report_rows, warning_rows):
+    # Итог пробной проверки: сводка и результат по каждому файлу.
+    # Предупреждения не мешают разрезанию, файл с ними считается годным
+    passed = sum(1 for rows in report_rows.values() if not rows)
+    warned = sum(1 for idx, rows in report_rows.items() if not rows and warning_rows[idx])
+    ws = add_sheet(wb, CHECK_SHEET_TITLE, [40, 15, 15, 17])
+    ws.append(bold_row(ws, ["Проверено файлов"]) + [len(report_rows)])
+    ws.append(bold_row(ws, ["Без ошибок"]) + [passed])
+    ws.append(bold_row(ws, ["Годных с предупреждениями"]) + [warned])
+    ws.append(bold_row(ws, ["С ошибками"]) + [len(report_rows) - passed])
+    ws.append([])
+    ws.append(bold_row(ws, CHECK_HEADER))
+    for idx in sorted(report_rows):
+        rows = report_rows[idx]
+        ws.append([
+            os.path.basename(files[idx - 1]),
+            "Ошибки" if rows else "Годен",
+            len(rows),
+            len(warning_rows[idx]),
+        ])
+
+
+def plan_split(original_doc, timer=None, first_rows=None):
+    # Разбор исходного документа и все проверки разрезания без записи
+    # файлов: наличие раздела "Перечень заданий", формат диапазонов
+    # и число заданий каждой компетенции. При ошибке - исключение.
+    # Таблицы разбираются в тексты ячеек один раз (table_texts); first_rows -
+    # уже прочитанные тексты первой таблицы.
+    # Возвращает словарь: 'competencies' - компетенции с их элементами
+    # и строками таблицы ключей, 'first_rows' и 'second_rows' - тексты
+    # таблиц, 'warnings' - пары (тип, строка) о пересечениях и пропусках
+    # диапазонов, не мешающих разрезанию
+    timer = timer or StageTimer()
+    timer.restart()
+
+    tables = original_doc.tables
+    if len(tables) < 2:
+        raise Exception("Не найдена таблица ключей (вторая таблица документа)")
+    if first_rows is None:
+        first_rows = table_texts(tables[0])
+    second_rows = table_texts(tables[1])
+
+    competencies = []
+    for cells in first_rows[1:]:
+        code = cells[0].strip().replace(" ", "")
+        competencies.append({'code': code, 'cells': cells})
+
+    per_list_start = None
+    for i, para in enumerate(original_doc.paragraphs):
+        if "Перечень заданий" in para.text:
+            per_list_start = i
+            break
+
+    if per_list_start is None:
+        raise Exception("Раздел 'Перечень заданий' не найден")
+
+    document_elements = list(original_doc.element.body[per_list_start + 1:])
+    competency_code_pattern = re.compile(r'^[A-ZА-Я]+\s*-\s*\d+', re.IGNORECASE)
+
+    text_cache = {}
+    segments = _segment_competencies(
+        document_elements, competency_code_pattern, text_cache
+    )
+    timer.count("Элементов тела", len(original_doc.element.body))
+    timer.count("Компетенций", len(competencies))
+
+    instruction_pattern = re.compile(r'^(\d+)\.\s*(Инструкция:|Фабула:)')
+    for comp in competencies:
+        current_elements = segments.get(comp['code'], [])
+
+        instruction_numbers = []
+        for el in current_elements:
+            if el.tag.endswith('p'):
+                text = _paragraph_text(el, text_cache)
+                m = instruction_pattern.match(text)
+                if m:
+                    instruction_numbers.append(int(m.group(1)))
+
+        num_text = comp['cells'][-1].strip()
+        m = re.match(r'(\d+)-(\d+)', num_text)
+        if not m:
+            raise Exception(
+                f"Компетенция {comp['code']}: неверный формат диапазона номеров '{num_text}' (должно быть например - 1-16)"
+            )
+        start = int(m.group(1))
+        end = int(m.group(2))
+        expected_count = end - start + 1
+
+        if len(instruction_numbers) != expected_count:
+            raise Exception(
+                f"Компетенция {comp['code']}: количество заданий ({len(instruction_numbers)}) "
+                f"не совпадает с ожидаемым ({expected_count})"
+            )
+
+        comp['elements'] = current_elements
+        comp['start'] = start
+        comp['end'] = end
+
+    task_index = _index_task_rows(second_rows)
+    warnings = []
+    for comp in competencies:
+        comp['task_rows'], missing = _pull_task_rows(task_index, comp['start'], comp['end'])
+        if missing:
+            warnings.append((
+                "Предупреждение: нет строк в таблице ключей",
+                f"{comp['code']}: задания {_format_numbers(missing)}",
+            ))
+    warnings.extend(_range_warnings(competencies))
+    timer.count("Строк ключей", sum(len(rows) for rows in task_index.values()))
+
+    timer.lap("Разбор")
+    return {
+        'competencies': competencies,
+        'first_rows': first_rows,
+        'second_rows': second_rows,
+        'warnings': warnings,
+    }
+
+
+def _index_task_rows(second_rows):
+    # Номер задания -> строки таблицы ключей с этим номером вместе с их
+    # позицией в таблице. Строки без номера пропускаются
+    index = defaultdict(list)
+    for pos, cells in enumerate(second_rows[1:]):
+        num_text = cells[0].strip()
+        try:
+            num = int(num_text.replace(".", "").strip())
+        except ValueError:
+            continue
+        index[num].append((pos, cells))
+    return index
+
+
+def _pull_task_rows(task_index, start, end):
+    # Строки диапазона start..end прямыми обращениями к индексу; в выходной
+    # таблице они идут в том же порядке, что и в исходной
+    found = []
+    missing = []
+    for num in range(start, end + 1):
+        rows = task_index.get(num)
+        if rows:
+            found.extend(rows)
+        else:
+            missing.append(num)
+    found.sort(key=lambda item: item[0])
+    return [row for _, row in found], missing
+
+
+def _range_warnings(competencies):
+    # Один проход по диапазонам, упорядоченным по началу: пересечение -
+    # начало следующего диапазона не больше самого дальнего конца
+    # предыдущих, пропуск - номера между ними не попали ни в один диапазон
+    warnings = []
+    ordered = sorted(competencies, key=lambda comp: (comp['start'], comp['end']))
+    reach = None
+    for comp in ordered:
+        if reach is not None:
+            if comp['start'] <= reach['end']:
+                warnings.append((
+                    "Предупреждение: диапазоны заданий пересекаются",
+                    f"{_format_range(reach)} и {_format_range(comp)}",
+                ))
+            elif comp['start'] > reach['end'] + 1:
+                gap = list(range(reach['end'] + 1, comp['start']))
+                warnings.append((
+                    "Предупреждение: пропуск в номерах заданий",
+                    f"задания {_format_numbers(gap)} между {_format_range(reach)} и {_format_range(comp)}",
+                ))
+        if reach is None or comp['end'] > reach['end']:
+            reach = comp
+    return warnings
+
+
+def _format_range(comp):
+    return f"{comp['code']} ({comp['start']}-{comp['end']})"
+
+
+def _format_numbers(numbers):
+    # 3, 5-7, 9: соседние номера сворачиваются в диапазоны
+    parts = []
+    first = prev = None
+    for num in numbers + [None]:
+        if first is not None and num == prev + 1:
+            prev = num
+            continue
+        if first is not None:
+            parts.append(str(first) if first == prev else f"{first}-{prev}")
+        first = prev = num
+    return ", ".join(parts)
+
+
+def process_file(original_doc, original_filename, output_dir, timer=None, first_rows=None,
+                 save=None):
+    # Все компетенции проверяются до записи первого выходного файла,
+    # поэтому для отклоненного исходного файла не остается частичных результатов.
+    # save(document, path) - запись выходного файла; по умолчанию сразу document.save
+    timer = timer or StageTimer()
+    save = save or (lambda document, path: document.save(path))
+    plan = plan_split(original_doc, timer, first_rows)
+
+    tables = original_doc.tables
+    first_table = tables[0]
+    second_table = tables[1]
+
+    first_header = plan['first_rows'][0]
+    second_header = plan['second_rows'][0]
+
+    skeleton = output_skeleton()
+    source_parts = SourceParts(original_doc, skeleton)
+    timer.lap("Разбор")
+
+    for comp in plan['competencies']:
+        new_doc = skeleton.new_document(source_parts.styles, source_parts.numbering)
+
+        t1 = add_table(
+            new_doc, [first_header, comp['cells']], len(first_table.columns)
+        )
+        set_table_borders(t1)
+
+        new_doc.add_paragraph("\n")
+
+        t2_rows = [second_header] + comp['task_rows']
+        t2 = add_table(new_doc, t2_rows, len(second_table.columns))
+        set_table_borders(t2)
+
+        new_doc.add_paragraph("\n")
+        heading = new_doc.add_paragraph("Перечень заданий")
+        heading.style = 'Heading 2'
+        new_doc.add_paragraph("\n")
+        timer.lap("Таблицы")
+
+        copied = [deepcopy(el) for el in comp['elements']]
+        new_doc.element.body.extend(copied)
+        source_parts.copy_relationships(copied, new_doc)
+        timer.lap("Копирование")
+
+        filename = f"{comp['code']}_{original_filename}"
+        save(new_doc, os.path.join(output_dir, filename))
+        timer.lap("Сохранение")
+        timer.count("Выходных файлов", 1)
+
+    return plan
+
+
+def output_skeleton():
+    # Заготовка выходного документа создается один раз на процесс
+    # (в пуле - на каждый рабочий процесс) и переиспользуется для всех компетенций
+    global _skeleton
+    if _skeleton is None:
+        _skeleton = OutputSkeleton()
+    return _skeleton
+
+
+def output_writer():
+    # Пул потоков записи тоже один на процесс. Процесс пула, порожденный
+    # через fork, наследует объект без самих потоков, поэтому пул
+    # создается заново, если процесс сменился
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        _writer = OutputWriter()
+        _writer_pid = os.getpid()
+    return _writer
+
+
+def _segment_competencies(document_elements, competency_code_pattern, text_cache):
+    # Один проход по телу документа: запоминаем позиции абзацев с кодами
+    # компетенций, затем каждой компетенции отдаём её срез
+    marks = []
+    for i, el in enumerate(document_elements):
+        if el.tag.endswith('p'):
+            txt = _paragraph_text(el, text_cache)
+            if competency_code_pattern.match(txt):
+                marks.append((i, txt))
+
+    segments = {}
+    for k, (start, code) in enumerate(marks):
+        if code in segments:
+            continue
+        # Повторы того же кода внутри раздела пропускаются,
+        # раздел заканчивается на первом коде другой компетенции
+        skipped = set()
+        end = len(document_elements)
+        for j in range(k + 1, len(marks)):
+            i, txt = marks[j]
+            if txt != code:
+                end = i
+                break
+            skipped.add(i)
+        segments[code] = [
+            document_elements[i] for i in range(start + 1, end)
+            if i not in skipped
+        ]
+    return segments
+
+
+def set_table_borders(table):
+    tbl = table._tbl
+    tblPr = tbl.tblPr
+    if tblPr is None:
+        tblPr = OxmlElement('w:tblPr')
+        tbl.insert(0, tblPr)
+
+    existing_borders = tblPr.find(qn('w:tblBorders'))
+    if existing_borders is not None:
+        tblPr.remove(existing_borders)
+
+    tblBorders = OxmlElement('w:tblBorders')
+
+    borders = [
+        ('top', 'single', 4, '000000'),
+        ('left', 'single', 4, '000000'),
+        ('bottom', 'single', 4, '000000'),
+        ('right', 'single', 4, '000000'),
+        ('insideH', 'single', 4, '000000'),
+        ('insideV', 'single', 4, '000000')
+    ]
+
+    for border_type, border_style, border_size, border_color in borders:
+        border = OxmlElement(f'w:{border_type}')
+        border.set(qn('w:val'), border_style)
+        border.set(qn('w:sz'), str(border_size))
+        border.set(qn('w:space'), '0')
+        border.set(qn('w:color'), border_color)
+        tblBorders.append(border)
+
+    tblPr.append(tblBorders)
+
+
+def _paragraph_text(element, text_cache):
+    # Текст абзаца (CT_P.text - то же, что Paragraph.text: неразрывный дефис,
+    # табуляции и переводы строк, без надписей внутри рисунков) читается
+    # прямо в дереве документа, без сериализации и повторного разбора XML.
+    # В кэше хранится нормализованная строка (без краевых пробелов и без
+    # пробелов внутри)
+    txt = text_cache.get(element)
+    if txt is None:
+        txt = (element.text or "").strip().replace(" ", "")
+        text_cache[element] = txt
+    return txt
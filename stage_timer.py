@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+from xlsx_report import add_sheet, bold_row
+
+
+# Замер времени этапов обработки. Таймер хранит только простые словари,
+# поэтому его можно вернуть из рабочего процесса пула вместе с результатом.
+
+TIMING_SHEET_TITLE = "Время этапов"
+TOTAL_LABEL = "Итого"
+
+
+class StageTimer:
+    def __init__(self):
+        self.durations = {}
+        self.counts = {}
+        self._last = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        # Время повторяющегося этапа (например, сохранения каждого
+        # выходного файла) суммируется
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def restart(self):
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        # Для последовательных этапов: время с предыдущей отметки
+        # (lap или restart) относится к этапу name
+        now = time.perf_counter()
+        self.add(name, now - self._last)
+        self._last = now
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def count(self, name, value):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    @property
+    def total(self):
+        return sum(self.durations.values())
+
+
+def add_timing_sheet(wb, timers, title=TIMING_SHEET_TITLE, name_header="Файл"):
+    # wb - книга в режиме write_only; timers - пары (название строки,
+    # StageTimer). Первой идет строка с итогами, затем строки по убыванию
+    # общего времени
+    stages = []
+    counters = []
+    for _, timer in timers:
+        stages.extend(name for name in timer.durations if name not in stages)
+        counters.extend(name for name in timer.counts if name not in counters)
+
+    headers = [name_header, "Всего, с"] + [f"{name}, с" for name in stages] + counters
+    ws = add_sheet(wb, title, [40] + [16] * (len(headers) - 1), freeze_panes='B3')
+    ws.append(bold_row(ws, headers))
+
+    totals = StageTimer()
+    for _, timer in timers:
+        for name, seconds in timer.durations.items():
+            totals.add(name, seconds)
+        for name, value in timer.counts.items():
+            totals.count(name, value)
+
+    ordered = sorted(timers, key=lambda item: item[1].total, reverse=True)
+    for label, timer in [(TOTAL_LABEL, totals)] + ordered:
+        ws.append(
+            (bold_row(ws, [label]) if timer is totals else [label])
+            + [round(timer.total, 3)]
+            + [round(timer.durations.get(name, 0.0), 3) for name in stages]
+            + [timer.counts.get(name, 0) for name in counters]
+        )
+    return ws
@@ -0,0 +1,661 @@
+import re
+import os
+import sys
+import hashlib
+import sqlite3
+from collections import defaultdict, namedtuple
+from lxml import etree
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsmap, qn
+from docx.parts.image import ImagePart
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.shared import Pt, RGBColor
+from docx.table import Table
+from docx_tables import Cell, add_table, table_texts
+from docx_stream import iter_body
+from ingest_cache import IngestCache
+from stage_timer import StageTimer, add_timing_sheet
+from xlsx_report import new_workbook, add_sheet, bold_row
+
+
+MAPPING_NAME = "Сопоставление_номеров_заданий.xlsx"
+MAPPING_HEADER = [
+    'Исходный файл',
+    'Исходный номер',
+    'Номер в сводном файле',
+    'Дисциплина',
+    'Компетенция'
+]
+
+W_DRAWING = qn('w:drawing')
+R_NS = '{%s}' % nsmap['r']
+WP_DOC_PR = qn('wp:docPr')
+
+# Строка таблицы компетенций файла (дисциплина) и строка таблицы ключей
+Discipline = namedtuple('Discipline', ['comp_code', 'discipline', 'semester', 'tasks', 'file_path'])
+Task = namedtuple('Task', ['file_path', 'original_num', 'cells'])
+
+
+def is_competency_file(name):
+    # ~$*.docx - служебные файлы блокировки, которые Word держит рядом
+    # с открытым документом
+    return name.endswith('.docx') and not name.startswith('~$')
+
+
+def iter_block_runs(blocks):
+    # Списки прогонов всех абзацев раздела заданий, включая абзацы в таблицах
+    for block in blocks:
+        if block['type'] == 'p':
+            yield block['runs']
+        else:
+            for row in block['rows']:
+                for cell in row:
+                    yield from cell
+
+
+class SummaryBuilder:
+    # Сборка сводного ФОС из файлов компетенций; не зависит от Qt
+    def __init__(self, use_cache=True, cache_path=None):
+        self.comp_order = {'УК': 1, 'ОПК': 2, 'ПК': 3}
+        self.summary_data = []
+        self.all_tasks = []
+        self.task_mapping = {}
+        self.comp_indicators = {}
+        self.task_sections = {}
+        self.images = {}
+        self.file_timers = []
+        self.use_cache = use_cache
+        self.cache_path = cache_path
+
+    def process_directory(self, dir_path, on_progress=None, is_cancelled=None):
+        # Возвращает False, если чтение было прервано
+        self.summary_data = []
+        self.all_tasks = []
+        self.comp_indicators = {}
+        self.task_sections = {}
+        self.images = {}
+        self.file_timers = []
+
+        docx_files = [f for f in os.listdir(dir_path) if is_competency_file(f)]
+        file_paths = [os.path.join(dir_path, filename) for filename in docx_files]
+
+        cache = self.open_cache()
+        try:
+            for i, file_path in enumerate(file_paths, start=1):
+                if is_cancelled is not None and is_cancelled():
+                    return False
+                if on_progress is not None:
+                    on_progress(i - 1, f"Обрабатывается файл {i} из {len(docx_files)}: {docx_files[i - 1]}")
+
+                timer = StageTimer()
+                with timer.stage("Кэш"):
+                    record = cache.get(file_path) if cache is not None else None
+                if record is None:
+                    with timer.stage("Чтение"):
+                        record = self.read_competency_file(file_path)
+                    if cache is not None:
+                        with timer.stage("Кэш"):
+                            cache.put(file_path, record)
+                self.add_record(file_path, record)
+                timer.count("Блоков", len(record['blocks']))
+                timer.count("Заданий", len(record['all_tasks']))
+                self.file_timers.append((docx_files[i - 1], timer))
+
+            if cache is not None:
+                cache.prune(dir_path, file_paths)
+        finally:
+            if cache is not None:
+                cache.close()
+
+        return True
+
+    def open_cache(self):
+        # Без кэша сборка работает как обычно, только медленнее
+        if not self.use_cache:
+            return None
+        try:
+            return IngestCache(self.cache_path)
+        except (OSError, sqlite3.Error):
+            return None
+
+    def has_data(self):
+        # Есть ли из чего строить сводный файл
+        return bool(self.summary_data) and (
+            bool(self.all_tasks) or any(self.task_sections.values())
+        )
+
+    def process_competency_file(self, file_path):
+        self.add_record(file_path, self.read_competency_file(file_path))
+
+    def add_record(self, file_path, record):
+        # Запись может прийти из кэша, поэтому путь к файлу подставляется заново.
+        # Повторяющиеся строки (путь, код, дисциплина) хранятся в одном экземпляре
+        file_path = sys.intern(file_path)
+        comp_code = sys.intern(os.path.basename(file_path).split('_')[0])
+        if record['indicators']:
+            self.comp_indicators[comp_code] = record['indicators']
+        self.summary_data.extend(
+            Discipline(comp_code, sys.intern(discipline), sys.intern(semester), tasks, file_path)
+            for discipline, semester, tasks in record['summary_data']
+        )
+        self.all_tasks.extend(
+            Task(file_path, original_num, cells) for original_num, cells in record['all_tasks']
+        )
+        self.task_sections[file_path] = record['blocks']
+        self.images.update(record['images'])
+
+    def read_competency_file(self, file_path):
+        # Файл читается одним потоковым проходом по document.xml (docx_stream):
+        # из первых двух таблиц сохраняется только текст ячеек, раздел
+        # "Перечень заданий" сразу раскладывается на блоки.
+        # Результат - запись из простых значений, пригодная для кэша
+        record = {'indicators': None, 'summary_data': [], 'all_tasks': []}
+
+        tables = []
+        table_count = 0
+        blocks = []
+        found_section = False
+        for item in iter_body(file_path):
+            if isinstance(item, Table):
+                table_count += 1
+                if table_count <= 2:
+                    tables.append(table_texts(item))
+                if found_section:
+                    blocks.append(self._table_block(item))
+                continue
+
+            text = item.text.strip()
+            if "Перечень заданий" in text:
+                found_section = True
+                continue
+            # Абзац только с рисунком (так Word ставит картинку отдельной
+            # строкой) текста не имеет, но тоже переносится
+            if found_section and (text or item._p.xpath('.//w:drawing')):
+                blocks.append(self._paragraph_block(item, text))
+
+        if table_count >= 2:
+            self.read_competency_tables(record, tables[0], tables[1])
+
+        # Раздел заданий извлекается один раз; таблицы, перечень заданий и
+        # таблица сопоставления строятся по этой копии без повторного чтения файла
+        record['blocks'] = blocks
+        record['images'] = {
+            key: self.images[key]
+            for runs in iter_block_runs(blocks)
+            for run in runs
+            for xml, refs in run[5]
+            for rId, reltype, key, target in refs
+            if key is not None
+        }
+        return record
+
+    def read_competency_tables(self, record, first_table, second_table):
+        # first_table, second_table - тексты ячеек по строкам
+        indicators_text = ""
+        header_cells = first_table[0]
+        indicator_col_idx = None
+        for idx, cell in enumerate(header_cells):
+            if "Наименование индикаторов" in cell:
+                indicator_col_idx = idx
+                break
+
+        if indicator_col_idx is not None:
+            indicator_parts = []
+            for row in first_table[1:]:
+                text = row[indicator_col_idx].strip()
+                if text and text not in indicator_parts:
+                    indicator_parts.append(text)
+            indicators_text = "\n".join(indicator_parts).strip()
+
+        if indicators_text:
+            record['indicators'] = indicators_text
+
+        for row_idx, cells in enumerate(first_table):
+            if row_idx == 0:
+                continue
+            if len(cells) < 6:
+                continue
+            discipline = cells[3].strip()
+            semester = cells[4].strip()
+            tasks = cells[5].strip()
+
+            record['summary_data'].append((discipline, semester, tasks))
+
+        for row_idx, cells in enumerate(second_table):
+            if row_idx == 0:
+                continue
+            if len(cells) < 6:
+                continue
+            if re.match(r'^\d+\.', cells[0].strip()):
+                # Из строки ключей нужны только первые шесть столбцов
+                record['all_tasks'].append((
+                    cells[0].strip().split('.')[0],
+                    tuple(cell.strip() for cell in cells[:6])
+                ))
+
+    def _paragraph_block(self, paragraph, text):
+        match = re.match(r'^(\d+)\.\s*(Инструкция:|Фабула:)', text)
+        return {
+            'type': 'p',
+            'text': text,
+            'task_num': match.group(1) if match else None,
+            'runs': self._extract_runs(paragraph)
+        }
+
+    def _table_block(self, table):
+        return {
+            'type': 'tbl',
+            'cols': len(table.columns),
+            'rows': [
+                [
+                    [self._extract_runs(paragraph) for paragraph in cell.paragraphs]
+                    for cell in row.cells
+                ]
+                for row in table.rows
+            ]
+        }
+
+    def _extract_runs(self, paragraph):
+        return [
+            (run.text, run.bold, run.italic, run.underline, run.font.size,
+             self._extract_drawings(run._r, paragraph.part))
+            for run in paragraph.runs
+        ]
+
+    def _extract_drawings(self, r, part):
+        # Встроенные рисунки прогона: XML элемента w:drawing и все его ссылки
+        # r:* (a:blip, svgBlip, гиперссылки на рисунке) в виде
+        # (rId, тип связи, ключ изображения, внешний адрес). Изображения
+        # хранятся один раз в self.images с ключом по хэшу содержимого.
+        # Рисунок со ссылкой, которую нельзя перенести (диаграмма, битая
+        # связь), пропускается, чтобы в сводном файле не было висячих rId
+        drawings = []
+        for drawing in r.iter(W_DRAWING):
+            refs = {}
+            for node in drawing.iter(tag=etree.Element):
+                for attr, rId in node.attrib.items():
+                    if not attr.startswith(R_NS) or rId in refs:
+                        continue
+                    refs[rId] = self._drawing_ref(part, rId)
+            if None in refs.values():
+                continue
+            drawings.append((etree.tostring(drawing), tuple(refs.values())))
+        return tuple(drawings)
+
+    def _drawing_ref(self, part, rId):
+        if rId in part.external_rels:
+            reltype, target = part.external_rels[rId]
+            return (rId, reltype, None, target)
+        image_part = part.related_parts.get(rId)
+        if image_part is None or part.rel_types.get(rId) != RT.IMAGE:
+            return None
+        blob = image_part.blob
+        key = hashlib.sha1(blob).hexdigest()
+        if key not in self.images:
+            self.images[key] = (blob, image_part.content_type, image_part.partname.ext)
+        return (rId, RT.IMAGE, key, None)
+
+    def write_summary(self, save_path, mapping_path=None, direction="", profile="", year="",
+                      on_progress=None, is_cancelled=None):
+        # Возвращает False, если построение было прервано
+        if mapping_path is None:
+            mapping_path = os.path.join(os.path.dirname(save_path), MAPPING_NAME)
+
+        sorted_data = sorted(
+            self.summary_data,
+            key=lambda x: (
+                self.get_comp_order(x.comp_code),
+                self.parse_semester(x.semester),
+                x.discipline
+            )
+        )
+
+        stages = [
+            "Заголовок и таблица компетенций...",
+            "Ключи к оцениванию...",
+            "Перечень заданий...",
+            "Таблица сопоставления...",
+        ]
+
+        def stage(index):
+            if is_cancelled is not None and is_cancelled():
+                return False
+            if on_progress is not None:
+                on_progress(index, stages[index])
+            return True
+
+        timer = StageTimer()
+        summary_doc = Document()
+        self._image_rIds = {}
+        self._drawing_id = 0
+        if not stage(0):
+            return False
+        self.add_template_header(summary_doc, direction, profile, year)
+        self.add_first_table(summary_doc, sorted_data)
+        timer.lap("Таблица компетенций")
+        if not stage(1):
+            return False
+        self.add_second_table(summary_doc, sorted_data)
+        timer.lap("Ключи")
+        if not stage(2):
+            return False
+        self.add_tasks_list(summary_doc, sorted_data)
+        timer.lap("Перечень заданий")
+
+        if not stage(3):
+            return False
+        summary_doc.save(save_path)
+        timer.lap("Сохранение")
+
+        # Таблица сопоставления пишется в отдельный файл по мере обхода
+        # заданий; на отдельном листе - время чтения каждого файла и этапов
+        # построения
+        self.save_mapping_table(
+            self.iter_mapping_rows(sorted_data), mapping_path,
+            self.file_timers + [("Сводный файл", timer)]
+        )
+        return True
+
+    def iter_mapping_rows(self, sorted_data):
+        # Строки таблицы сопоставления в порядке MAPPING_HEADER
+        for disc in sorted_data:
+            current_num = self.task_mapping[disc.file_path]['start']
+            filename = os.path.basename(disc.file_path)
+
+            for block in self.task_sections.get(disc.file_path, []):
+                if block['type'] == 'p' and block['task_num'] is not None:
+                    yield [
+                        filename,
+                        block['task_num'],
+                        current_num,
+                        disc.discipline,
+                        disc.comp_code
+                    ]
+                    current_num += 1
+
+    def save_mapping_table(self, mapping_rows, file_path, timers=None):
+        # Книга в режиме write_only: строки уходят в файл по одной
+        wb = new_workbook()
+        ws = add_sheet(wb, "Сопоставление номеров", [25] * len(MAPPING_HEADER))
+        ws.append(bold_row(ws, MAPPING_HEADER))
+
+        for row in mapping_rows:
+            ws.append(row)
+
+        if timers:
+            add_timing_sheet(wb, timers)
+        wb.save(file_path)
+
+    def add_template_header(self, doc, direction="", profile="", year=""):
+        def add_centered_bold_paragraph(text):
+            p = doc.add_paragraph()
+            p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+            p.paragraph_format.line_spacing = 1  # межстрочный интервал
+            p.paragraph_format.space_before = Pt(0)  # интервал перед
+            p.paragraph_format.space_after = Pt(0)  # интервал после
+
+            run = p.add_run(text)
+            run.bold = True
+            font = run.font
+            font.name = 'Times New Roman'
+            font.size = Pt(12)
+            font.color.rgb = RGBColor(0, 0, 0)
+            r = run._element
+            r.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+            return p
+
+        add_centered_bold_paragraph('Фонд оценочных средств')
+
+        direction = direction or "____________________"
+        profile = profile or "____________________"
+        year = year or "20__"
+
+        add_centered_bold_paragraph('для оценки остаточных знаний обучающихся по направлению подготовки')
+        add_centered_bold_paragraph(f'Направление: {direction}')
+        add_centered_bold_paragraph(f'Профиль: {profile}')
+        add_centered_bold_paragraph(f'Год начала подготовки – {year}')
+        doc.add_paragraph()
+
+    def add_first_table(self, doc, sorted_data):
+        doc.add_heading('Распределение тестовых заданий по компетенциям и дисциплинам', level=2)
+        # Заголовки таблицы (выравнивание по центру)
+        rows = [self._header_row([
+            "Код компетенции",
+            "Наименование компетенции",
+            "Наименование индикаторов",
+            "Наименование дисциплины/модуля/практики",
+            "Семестр",
+            "Номер задания",
+        ])]
+
+        current_task_num = 1
+        comp_groups = defaultdict(list)
+        for disc in sorted_data:
+            comp_groups[disc.comp_code].append(disc)
+
+        for comp_code, disciplines in comp_groups.items():
+            group_size = len(disciplines)
+            for i, disc in enumerate(disciplines):
+                task_count = self.calculate_task_count(disc.tasks)
+
+                # Столбцы 0-2 группы объединяются по вертикали сразу при
+                # построении: первая строка начинает объединение (restart) и
+                # получает по пустому абзацу на каждую присоединенную строку,
+                # как после cell.merge(), остальные строки его продолжают
+                if group_size == 1:
+                    merged = [comp_code, "", self.comp_indicators.get(comp_code, "")]
+                elif i == 0:
+                    merged = [
+                        Cell([text] + [""] * (group_size - 1), vmerge='restart',
+                             align=WD_PARAGRAPH_ALIGNMENT.LEFT)
+                        for text in (comp_code, "", self.comp_indicators.get(comp_code, ""))
+                    ]
+                else:
+                    merged = [Cell(None, vmerge='continue')] * 3
+
+                rows.append(merged + [
+                    disc.discipline,
+                    disc.semester,
+                    f"{current_task_num}-{current_task_num + task_count - 1}",
+                ])
+
+                self.task_mapping[disc.file_path] = {
+                    'discipline': disc.discipline,
+                    'start': current_task_num,
+                    'end': current_task_num + task_count - 1,
+                    'tasks': []
+                }
+
+                current_task_num += task_count
+
+        # Выравнивание всего текста в строках данных по левому краю
+        add_table(doc, rows, 6, style='Table Grid',
+                  alignment=WD_TABLE_ALIGNMENT.CENTER,
+                  align=WD_PARAGRAPH_ALIGNMENT.LEFT)
+
+    def add_second_table(self, doc, sorted_data):
+        doc.add_heading('Распределение заданий по типам и уровням сложности', level=2)
+        doc.add_heading('Ключи к оцениванию', level=3)
+
+        # Заголовки таблицы (выравнивание по центру)
+        rows = [self._header_row([
+            "№ задания",
+            "Верный ответ",
+            "Критерии",
+            "Тип задания",
+            "Уровень сложности",
+            "Время выполнения (мин.)",
+        ])]
+
+        tasks_by_file = defaultdict(list)
+        for task in self.all_tasks:
+            tasks_by_file[task.file_path].append(task)
+
+        current_task_num = 1
+
+        for disc in sorted_data:
+            # Заголовок дисциплины (выравнивание по центру)
+            rows.append([Cell(disc.discipline, span=6, bold=True,
+                              align=WD_PARAGRAPH_ALIGNMENT.CENTER)])
+
+            file_tasks = tasks_by_file.get(disc.file_path, [])
+            task_count_in_first_table = (
+                    self.task_mapping[disc.file_path]['end'] -
+                    self.task_mapping[disc.file_path]['start'] + 1
+            )
+
+            for idx in range(task_count_in_first_table):
+                new_num = current_task_num + idx
+                row_cells = [str(new_num)] + [None] * 5
+
+                if idx < len(file_tasks):
+                    task = file_tasks[idx]
+                    for i in range(1, min(6, len(task.cells))):
+                        row_cells[i] = task.cells[i]
+                else:
+                    for i in range(1, 6):
+                        row_cells[i] = "—"
+
+                rows.append(row_cells)
+
+            current_task_num += task_count_in_first_table
+
+        # Выравнивание всего текста в строках данных по левому краю
+        add_table(doc, rows, 6, style='Table Grid',
+                  alignment=WD_TABLE_ALIGNMENT.CENTER,
+                  align=WD_PARAGRAPH_ALIGNMENT.LEFT)
+
+    def _header_row(self, headers):
+        return [
+            Cell(text, bold=True, align=WD_PARAGRAPH_ALIGNMENT.CENTER)
+            for text in headers
+        ]
+
+    def add_tasks_list(self, doc, sorted_data):
+        doc.add_heading('Перечень заданий', level=2)
+
+        for disc in sorted_data:
+            current_num = self.task_mapping[disc.file_path]['start']
+
+            doc.add_heading(disc.discipline, level=3)
+
+            for block in self.task_sections.get(disc.file_path, []):
+                if block['type'] == 'p':
+                    if block['task_num'] is not None:
+                        new_text = re.sub(r'^(\d+)\.', f'{current_num}.', block['text'], count=1)
+                        new_paragraph = doc.add_paragraph()
+                        new_paragraph.add_run(new_text).bold = True
+                        for run in block['runs']:
+                            if run[5]:
+                                self._add_drawings(new_paragraph.add_run(), run[5])
+                        current_num += 1
+                    else:
+                        new_paragraph = doc.add_paragraph()
+                        self._add_runs(new_paragraph, block['runs'])
+
+                elif block['type'] == 'tbl':
+                    new_table = doc.add_table(rows=len(block['rows']), cols=block['cols'])
+                    new_table.style = 'Table Grid'
+
+                    for i, row in enumerate(block['rows']):
+                        for j, cell in enumerate(row):
+                            new_cell = new_table.cell(i, j)
+                            new_cell.text = ''
+                            for runs in cell:
+                                new_paragraph = new_cell.add_paragraph()
+                                self._add_runs(new_paragraph, runs)
+
+    def _add_runs(self, paragraph, runs):
+        for text, bold, italic, underline, size, drawings in runs:
+            new_run = paragraph.add_run(text)
+            new_run.bold = bold
+            new_run.italic = italic
+            new_run.underline = underline
+            if size:
+                new_run.font.size = size
+            self._add_drawings(new_run, drawings)
+
+    def _add_drawings(self, run, drawings):
+        for xml, refs in drawings:
+            drawing = parse_xml(xml)
+            rIds = {}
+            for rId, reltype, key, target in refs:
+                if key is not None:
+                    rIds[rId] = self._image_rId(run.part, key)
+                else:
+                    rIds[rId] = run.part.relate_to(target, reltype, is_external=True)
+            # Все ссылки r:* рисунка переписываются на связи сводного файла
+            for node in drawing.iter(tag=etree.Element):
+                for attr, rId in node.attrib.items():
+                    if attr.startswith(R_NS):
+                        node.set(attr, rIds[rId])
+            # Идентификаторы рисунков должны быть уникальны в документе
+            for doc_pr in drawing.iter(WP_DOC_PR):
+                self._drawing_id += 1
+                doc_pr.set('id', str(self._drawing_id))
+            run._r.append(drawing)
+
+    def _image_rId(self, part, key):
+        # Одинаковые изображения из разных файлов попадают в сводный файл
+        # одной частью; байты переносятся без декодирования картинки
+        rId = self._image_rIds.get(key)
+        if rId is None:
+            blob, content_type, ext = self.images[key]
+            partname = PackURI(f'/word/media/image{len(self._image_rIds) + 1}.{ext}')
+            rId = part.relate_to(ImagePart(partname, content_type, blob), RT.IMAGE)
+            self._image_rIds[key] = rId
+        return rId
+
+    def merge_cells(self, table, start_row, end_row, col_idx):
+        cell_start = table.cell(start_row, col_idx)
+        for row in range(start_row + 1, end_row + 1):
+            cell_next = table.cell(row, col_idx)
+            cell_start.merge(cell_next)
+
+    def get_comp_order(self, code):
+        match = re.match(r'([А-Я]+)-(\d+)', code)
+        if match:
+            comp_type = match.group(1)
+            comp_num = int(match.group(2))
+            return (self.comp_order.get(comp_type, 99), comp_num)
+        return (99, 99)
+
+    def parse_semester(self, semester_str):
+        try:
+            clean_str = re.sub(r'[^\d,-]', '', semester_str)
+
+            # Если есть запятые (несколько семестров)
+            if ',' in clean_str:
+                semesters = [int(s.strip()) for s in clean_str.split(',') if s.strip()]
+                return min(semesters) + 0.5  # Добавляем 0.5, чтобы диапазон был после одиночного семестра
+
+            # Если есть дефис (диапазон)
+            elif '-' in clean_str:
+                parts = clean_str.split('-')
+                if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+                    return int(parts[0]) + 0.5  # Добавляем 0.5, чтобы диапазон был после одиночного семестра
+
+            # Одиночный семестр
+            elif clean_str.isdigit():
+                return int(clean_str)
+
+            return 0
+        except ValueError:
+            return 0
+
+    def calculate_task_count(self, tasks_str):
+        clean_str = re.sub(r'[^\d,-]', '', tasks_str)
+        if '-' in clean_str:
+            parts = clean_str.split('-')
+            if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+                return int(parts[1]) - int(parts[0]) + 1
+        elif ',' in clean_str:
+            return len(clean_str.split(','))
+        try:
+            return int(clean_str)
+        except ValueError:
+            return 0
@@ -0,0 +1,32 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+
+# Отчеты Excel пишутся в режиме write_only: строки не хранятся в книге,
+# а сразу сериализуются, поэтому память не растет с числом строк.
+# В этом режиме ширины столбцов и закрепление областей задаются до первой
+# строки, а оформление - через WriteOnlyCell.
+
+
+def new_workbook():
+    return Workbook(write_only=True)
+
+
+def add_sheet(wb, title=None, widths=(), freeze_panes=None):
+    ws = wb.create_sheet(title)
+    for col, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    if freeze_panes is not None:
+        ws.freeze_panes = freeze_panes
+    return ws
+
+
+def bold_row(ws, values):
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value)
+        cell.font = Font(bold=True)
+        cells.append(cell)
+    return cells